@@ -2,9 +2,11 @@ from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from models.prompt_templates import FORMAT_CLASSIFICATION_PROMPT, INTENT_CLASSIFICATION_PROMPT
+from Agents.model_cascade import CascadeStats, DeadlineExceeded, bind_deadline
 from dotenv import load_dotenv
 import os
 import logging
+import time
 
 load_dotenv()
 
@@ -12,8 +14,10 @@ Format_labels = ["PDF", "EMAIL", "JSON"]
 Intent_labels = ["Invoice", "RFQ", "Complaint", "Regulation", "General Enquiry"]
 
 class ClassifierAgent:
-    def __init__(self, groq_api_key: str, model_name: str = "llama-3.3-70b-versatile"):
+    def __init__(self, groq_api_key: str, model_name: str = "llama-3.3-70b-versatile",
+                 fast_model_name: str = None):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.cascade_stats = CascadeStats()
         
         try:
             self.llm = ChatGroq(
@@ -21,6 +25,12 @@ class ClassifierAgent:
                 model_name=model_name,
                 api_key=groq_api_key
             )
+            # Optional small model tried first; the large model only sees escalations
+            self.fast_llm = ChatGroq(
+                temperature=0,
+                model_name=fast_model_name,
+                api_key=groq_api_key
+            ) if fast_model_name else None
         except Exception as e:
             self.logger.error(f"Failed to initialize ChatGroq: {e}")
             raise
@@ -33,47 +43,91 @@ class ClassifierAgent:
         self.format_prompt = ChatPromptTemplate.from_template(FORMAT_CLASSIFICATION_PROMPT)
         self.intent_prompt = ChatPromptTemplate.from_template(INTENT_CLASSIFICATION_PROMPT)
     
-    def _validate_format(self, response: str) -> str:
-        """Validate and clean format response"""
-        response = response.strip().upper()
+    def _match_format(self, response: str):
+        """Return (label, exact) where exact is False if fallback logic was needed"""
+        response = response.strip().strip('"\'.').upper()
         if response in Format_labels:
-            return response
+            return response, True
         # Fallback logic
         if 'PDF' in response:
-            return 'PDF'
+            return 'PDF', False
         elif 'EMAIL' in response:
-            return 'EMAIL'
+            return 'EMAIL', False
         elif 'JSON' in response:
-            return 'JSON'
+            return 'JSON', False
         else:
             self.logger.warning(f"Unknown format response: {response}, defaulting to EMAIL")
-            return 'EMAIL'
-    
-    def _validate_intent(self, response: str) -> str:
-        """Validate and clean intent response"""
+            return 'EMAIL', False
+
+    def _validate_format(self, response: str) -> str:
+        """Validate and clean format response"""
+        return self._match_format(response)[0]
+
+    def _match_intent(self, response: str):
+        """Return (label, exact) where exact is False if fallback logic was needed"""
         response = response.strip()
+        cleaned = response.strip('"\'.').lower()
+        for intent in Intent_labels:
+            if cleaned == intent.lower() or (intent == "RFQ" and cleaned.startswith("rfq")):
+                return intent, True
         for intent in Intent_labels:
             if intent.lower() in response.lower():
-                return intent
+                return intent, False
         self.logger.warning(f"Unknown intent response: {response}, defaulting to General Enquiry")
-        return 'General Enquiry'
+        return 'General Enquiry', False
+    
+    def _validate_intent(self, response: str) -> str:
+        """Validate and clean intent response"""
+        return self._match_intent(response)[0]
+
+    def _cascade(self, prompt, parser, matcher, input_txt: str, deadline: float = None) -> str:
+        """
+        Ask the fast model first and accept its answer only when it is an
+        exact label; anything the validator had to repair is escalated.
+        No large-model call is started once deadline (time.monotonic()) has passed,
+        and each call times out at the deadline
+        """
+        if self.fast_llm is not None:
+            try:
+                start = time.perf_counter()
+                response = (prompt | bind_deadline(self.fast_llm, deadline) | parser).invoke(
+                    {"input_content": input_txt}
+                )
+                self.cascade_stats.record("fast", time.perf_counter() - start)
+                label, exact = matcher(response)
+                if exact:
+                    return label
+                self.cascade_stats.escalate("validator_fallback")
+            except Exception as e:
+                self.logger.warning(f"Fast model failed, escalating: {e}")
+                self.cascade_stats.escalate("fast_model_error")
 
-    def classify_format(self, input_txt: str) -> str:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceeded("Deadline passed before the large model could be called")
+        start = time.perf_counter()
         try:
-            # Create the chain properly
-            chain = self.format_prompt | self.llm | self.format_parser
-            response = chain.invoke({"input_content": input_txt})
-            return self._validate_format(response)
+            response = (prompt | bind_deadline(self.llm, deadline) | parser).invoke({"input_content": input_txt})
+        except Exception as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded(f"Large model timed out at the deadline: {e}") from e
+            raise
+        self.cascade_stats.record("large", time.perf_counter() - start)
+        return matcher(response)[0]
+
+    def classify_format(self, input_txt: str, deadline: float = None) -> str:
+        try:
+            return self._cascade(self.format_prompt, self.format_parser, self._match_format, input_txt, deadline)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Format classification failed: {e}")
             return "EMAIL"  # Default fallback
 
-    def classify_intent(self, input_txt: str) -> str:
+    def classify_intent(self, input_txt: str, deadline: float = None) -> str:
         try:
-            # Create the chain properly
-            chain = self.intent_prompt | self.llm | self.intent_parser
-            response = chain.invoke({"input_content": input_txt})
-            return self._validate_intent(response)
+            return self._cascade(self.intent_prompt, self.intent_parser, self._match_intent, input_txt, deadline)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Intent classification failed: {e}")
             return "General Enquiry"  # Default fallback
@@ -3,15 +3,22 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from models.prompt_templates import EMAIL_EXTRACTION_PROMPT
 from dotenv import load_dotenv
+from Agents.json_stream import IncrementalJSONParser
+from Agents.model_cascade import CascadeStats, DeadlineExceeded, bind_deadline
 import os
-import json
 import logging
+import time
 
 load_dotenv()
 
+REQUIRED_FIELDS = ["sender_name", "sender_email", "urgency", "summary", "action"]
+URGENCY_LEVELS = ["High", "Medium", "Low"]
+
 class EmailAgent:
-    def __init__(self, groq_api_key: str, model_name: str = "llama-3.3-70b-versatile"):
+    def __init__(self, groq_api_key: str, model_name: str = "llama-3.3-70b-versatile",
+                 fast_model_name: str = None):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.cascade_stats = CascadeStats()
         
         try:
             self.llm = ChatGroq(
@@ -19,6 +26,12 @@ class EmailAgent:
                 api_key=groq_api_key,
                 model_name=model_name
             )
+            # Optional small model tried first; the large model only sees escalations
+            self.fast_llm = ChatGroq(
+                temperature=0,
+                api_key=groq_api_key,
+                model_name=fast_model_name
+            ) if fast_model_name else None
         except Exception as e:
             self.logger.error(f"Failed to initialize ChatGroq: {e}")
             raise
@@ -26,7 +39,83 @@ class EmailAgent:
         self.output_parser = StrOutputParser()
         self.prompt = ChatPromptTemplate.from_template(EMAIL_EXTRACTION_PROMPT)
 
-    def parse_email(self, email_txt: str) -> dict:
+    def _emit(self, on_field, field: str, value):
+        if on_field:
+            try:
+                on_field(field, value)
+            except Exception as e:
+                self.logger.warning(f"on_field callback failed: {e}")
+
+    def _stream_extract(self, llm, email_txt: str, on_field, deadline: float = None):
+        """
+        Stream one completion, surfacing each field as soon as it is complete.
+        Past deadline (time.monotonic()) the stream is abandoned, which closes the request;
+        the request itself times out at the deadline if no token arrives
+        """
+        chain = self.prompt | bind_deadline(llm, deadline) | self.output_parser
+        parser = IncrementalJSONParser()
+        chunks = []
+        start = time.perf_counter()
+        try:
+            for chunk in chain.stream({"email_content": email_txt}):
+                chunks.append(chunk)
+                for field, value in parser.feed(chunk):
+                    self._emit(on_field, field, value)
+                if deadline is not None and time.monotonic() >= deadline and not parser.done:
+                    raise DeadlineExceeded(f"Email extraction stopped after {len(parser.fields)} fields")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded(f"Email extraction timed out at the deadline: {e}") from e
+            raise
+        return parser, "".join(chunks), time.perf_counter() - start
+
+    @staticmethod
+    def _escalation_reason(parser: IncrementalJSONParser):
+        """Why a fast-model extraction can't be trusted, or None if it can"""
+        if not parser.fields:
+            return "malformed_json"
+        if not parser.done:
+            return "truncated_json"
+        if any(field not in parser.fields for field in REQUIRED_FIELDS):
+            return "missing_fields"
+        if parser.fields.get("urgency") not in URGENCY_LEVELS:
+            return "invalid_urgency"
+        return None
+
+    @staticmethod
+    def _valid_on_its_own(field: str, value) -> bool:
+        """Fast-tier fields that can be checked without the rest of the answer"""
+        if field == "urgency":
+            return value in URGENCY_LEVELS
+        if field == "sender_email":
+            return isinstance(value, str) and "@" in value
+        if field == "sender_name":
+            return isinstance(value, str) and bool(value.strip())
+        return False
+
+    @staticmethod
+    def _complete_fields(parser: IncrementalJSONParser) -> dict:
+        parsed_result = dict(parser.fields)
+        # Ensure all required fields are present
+        for field in REQUIRED_FIELDS:
+            if field not in parsed_result:
+                parsed_result[field] = ""
+        return parsed_result
+
+    def parse_email(self, email_txt: str, on_field=None, deadline: float = None) -> dict:
+        """
+        Extract sender, urgency, summary and action from an email.
+        on_field(name, value) is called for each field as soon as it has
+        been fully generated, before the rest of the completion arrives.
+        Fast-tier sender and urgency fields are sent as soon as they pass
+        their own checks; summary and action wait until the fast answer
+        is accepted. If it is escalated anyway, the large model's value
+        is sent again for any early field it disagrees with.
+        Raises DeadlineExceeded if deadline (time.monotonic()) passes first;
+        fields already sent to on_field are all the caller gets.
+        """
         if not email_txt or not email_txt.strip():
             return {
                 "error": "Empty email content provided",
@@ -37,34 +126,64 @@ class EmailAgent:
                 "action": ""
             }
 
+        sent = {}
+
+        def send_checked(field, value):
+            if self._valid_on_its_own(field, value):
+                sent[field] = value
+                self._emit(on_field, field, value)
+
+        def send_changed(field, value):
+            if field not in sent or sent[field] != value:
+                self._emit(on_field, field, value)
+
         try:
-            
-            chain = self.prompt | self.llm | self.output_parser
-            result = chain.invoke({"email_content": email_txt})
-            
-            # Try to parse as JSON
-            try:
-                parsed_result = json.loads(result)
-                # Ensure all required fields are present
-                required_fields = ["sender_name", "sender_email", "urgency", "summary", "action"]
-                for field in required_fields:
-                    if field not in parsed_result:
-                        parsed_result[field] = ""
-                
-                return parsed_result
-            except json.JSONDecodeError as e:
-                self.logger.warning(f"JSON parsing failed: {e}")
-                # Return structured fallback
-                return {
-                    "error": "LLM returned unstructured output",
-                    "raw_response": result,
-                    "sender_name": "",
-                    "sender_email": "",
-                    "urgency": "Medium",
-                    "summary": result[:200] if result else "",
-                    "action": ""
-                }
+            if self.fast_llm is not None:
+                try:
+                    parser, result, seconds = self._stream_extract(
+                        self.fast_llm, email_txt, send_checked if on_field else None, deadline
+                    )
+                    self.cascade_stats.record("fast", seconds)
+                    reason = self._escalation_reason(parser)
+                    if reason is None:
+                        for field, value in parser.fields.items():
+                            if field not in sent:
+                                self._emit(on_field, field, value)
+                        return self._complete_fields(parser)
+                    self.logger.info(f"Escalating email extraction to the large model: {reason}")
+                    self.cascade_stats.escalate(reason)
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"Fast model failed, escalating: {e}")
+                    self.cascade_stats.escalate("fast_model_error")
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded("Deadline passed before the large model could be called")
+            parser, result, seconds = self._stream_extract(
+                self.llm, email_txt, send_changed if sent else on_field, deadline
+            )
+            self.cascade_stats.record("large", seconds)
+
+            if parser.fields:
+                if not parser.done:
+                    self.logger.warning("LLM output ended before the JSON object closed")
+                return self._complete_fields(parser)
+
+            self.logger.warning("No JSON object found in LLM output")
+            # Return structured fallback
+            return {
+                "error": "LLM returned unstructured output",
+                "raw_response": result,
+                "sender_name": "",
+                "sender_email": "",
+                "urgency": "Medium",
+                "summary": result[:200] if result else "",
+                "action": ""
+            }
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Email parsing failed: {e}")
             return {
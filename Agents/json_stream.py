@@ -0,0 +1,88 @@
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Incrementally parses the first JSON object in a token stream.
+    Anything before the opening brace (markdown fences, chatter) and
+    after the closing brace is ignored. Each top-level field is returned
+    from feed() as soon as its value is complete. A braced span that
+    closes without a single valid member (e.g. "{see below}" in the
+    chatter) is skipped and scanning continues.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.done = False
+        self._reset()
+
+    def _reset(self):
+        self._buffer = []      # characters of the object seen so far
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 1  # buffer index where the current top-level member begins
+
+    def _close_member(self, end: int) -> tuple:
+        member = "".join(self._buffer[self._member_start:end]).strip()
+        self._member_start = end + 1
+        if not member:
+            return None
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return None
+        key, value = next(iter(parsed.items()))
+        self.fields[key] = value
+        return key, value
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of text and return newly completed (key, value) pairs"""
+        completed = []
+        if self.done or not chunk:
+            return completed
+
+        for ch in chunk:
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._buffer.append(ch)
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    member = self._close_member(len(self._buffer) - 1)
+                    if member:
+                        completed.append(member)
+                    if not self.fields:
+                        self._reset()
+                        continue
+                    self.done = True
+                    break
+            elif ch == "," and self._depth == 1:
+                member = self._close_member(len(self._buffer) - 1)
+                if member:
+                    completed.append(member)
+
+        return completed
+
+    @property
+    def started(self) -> bool:
+        return self._started
@@ -0,0 +1,85 @@
+import threading
+import time
+import weakref
+
+DEFAULT_FAST_MODEL = "llama-3.1-8b-instant"
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised by an agent that stops early because the caller's deadline passed"""
+
+
+_no_retry_lock = threading.Lock()
+_no_retry = {}  # id(llm) -> (weakref to llm, copy of llm without SDK retries)
+
+
+def _without_retries(llm):
+    """
+    Copy of a ChatGroq whose Groq client never retries (cached per llm).
+    Models without a Groq client, such as the benchmark stub, are
+    returned unchanged
+    """
+    client = getattr(getattr(llm, "client", None), "_client", None)
+    if not hasattr(client, "with_options") or getattr(client, "max_retries", 0) == 0:
+        return llm
+    key = id(llm)
+    with _no_retry_lock:
+        cached = _no_retry.get(key)
+        if cached and cached[0]() is llm:
+            return cached[1]
+        update = {"client": client.with_options(max_retries=0).chat.completions, "max_retries": 0}
+        async_client = getattr(getattr(llm, "async_client", None), "_client", None)
+        if hasattr(async_client, "with_options"):
+            update["async_client"] = async_client.with_options(max_retries=0).chat.completions
+        copy = llm.model_copy(update=update)
+        _no_retry[key] = (weakref.ref(llm, lambda _: _no_retry.pop(key, None)), copy)
+        return copy
+
+
+def bind_deadline(llm, deadline: float = None):
+    """
+    llm with its request timeout cut to the time left before deadline
+    (time.monotonic()), so a call the caller abandons at the deadline is
+    also dropped by the HTTP client instead of holding its thread.
+    SDK retries are disabled too: each one would get a fresh timeout
+    (plus backoff) and run past the deadline
+    """
+    if deadline is None:
+        return llm
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline passed before the model could be called")
+    return _without_retries(llm).bind(timeout=remaining)
+
+
+class CascadeStats:
+    """Thread-safe per-tier call counts and latencies for a model cascade"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {"fast": 0, "large": 0}
+        self._seconds = {"fast": 0.0, "large": 0.0}
+        self._escalations = 0
+        self._reasons = {}
+
+    def record(self, tier: str, seconds: float):
+        with self._lock:
+            self._calls[tier] += 1
+            self._seconds[tier] += seconds
+
+    def escalate(self, reason: str):
+        with self._lock:
+            self._escalations += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self._calls),
+                "avg_latency_ms": {
+                    tier: round(self._seconds[tier] / n * 1000, 1) if n else 0.0
+                    for tier, n in self._calls.items()
+                },
+                "escalations": self._escalations,
+                "escalation_reasons": dict(self._reasons)
+            }
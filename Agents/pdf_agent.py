@@ -7,29 +7,64 @@ class PDFAgent:
         logging.basicConfig(level=log_level)
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def _pages(self,doc) -> list:
+        pages = [page.get_text() for page in doc]
+        self.logger.info(f"Extracted {len(pages)} pages of text.")
+        return pages
+
+    def _extract(self,doc) -> str:
+        return "\n".join(self._pages(doc))
+
     def extract_text(self,pdf_bytes:bytes) -> str:
         '''
         uses PyMuPDF  to pull text from the PDF
         '''
         try:
             doc = fitz.open(stream=pdf_bytes,filetype="pdf")
-            text = []
-            for page in doc:
-                text.append(page.get_text())
-            full_text = "\n".join(text)
-            self.logger.info(f"Extracted {len(text)} pages of text.")
+            try:
+                return self._extract(doc)
+            finally:
+                doc.close()
+        except Exception as e :
+            self.logger.error(f"PDF  text extraction failed: {e}")
+            raise    
 
-            return full_text 
+    def extract_text_from_file(self,path:str) -> str:
+        '''
+        Same as extract_text, but PyMuPDF reads pages from the file
+        itself so the whole document is never held as a bytes copy
+        '''
+        try:
+            doc = fitz.open(path,filetype="pdf")
+            try:
+                return self._extract(doc)
+            finally:
+                doc.close()
         except Exception as e :
             self.logger.error(f"PDF  text extraction failed: {e}")
             raise    
-    def process(self,pdf_bytes:bytes,intent:str=None) ->dict:
+    def extract_pages(self,pdf_bytes:bytes=None,path:str=None) -> list:
+        '''
+        Per-page text, from a file path when given (not read into memory)
+        or from bytes. Page n of the document is element n-1
+        '''
+        try:
+            doc = fitz.open(path,filetype="pdf") if path else fitz.open(stream=pdf_bytes,filetype="pdf")
+            try:
+                return self._pages(doc)
+            finally:
+                doc.close()
+        except Exception as e :
+            self.logger.error(f"PDF  text extraction failed: {e}")
+            raise
+
+    def process(self,pdf_bytes:bytes,intent:str=None,text:str=None) ->dict:
         '''
-        1. Extract the PDF text.
+        1. Extract the PDF text (skipped when the caller already has it).
         2. (Optionally) could re-run for intent detection here.
         3. Return dict with the raw  text and  metadata
         '''       
-        raw_text = self.extract_text(pdf_bytes)
+        raw_text = text if text is not None else self.extract_text(pdf_bytes)
 
         return {
             "raw_text":raw_text,
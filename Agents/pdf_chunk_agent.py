@@ -0,0 +1,211 @@
+from langchain_groq import ChatGroq
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from models.prompt_templates import PDF_CHUNK_PROMPT
+from dotenv import load_dotenv
+from Agents.json_stream import IncrementalJSONParser
+from Agents.model_cascade import bind_deadline
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import re
+import time
+
+load_dotenv()
+
+# Rough token estimate for Llama-family tokenizers on English text
+CHARS_PER_TOKEN = 4
+LIST_FIELDS = ["key_points", "parties", "dates", "amounts"]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _pack(units, max_chars: int, sep: str) -> list:
+    """Greedily join units with sep into pieces of at most max_chars, hard-splitting oversized units"""
+    pieces, current = [], ""
+    for unit in units:
+        while len(unit) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(unit[:max_chars])
+            unit = unit[max_chars:]
+        if current and len(current) + len(sep) + len(unit) > max_chars:
+            pieces.append(current)
+            current = unit
+        else:
+            current = current + sep + unit if current else unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _split_page(text: str, max_tokens: int) -> list:
+    """A page as one piece, or split at paragraph then line boundaries if it exceeds the budget"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    units = []
+    for paragraph in paragraphs:
+        units.extend(_pack(paragraph.split("\n"), max_chars, "\n") if len(paragraph) > max_chars else [paragraph])
+    return _pack(units, max_chars, "\n\n")
+
+
+def chunk_pages(pages, max_tokens: int = 1500) -> list:
+    """
+    Group consecutive pages into chunks of at most max_tokens (estimated).
+    Each chunk is {"index", "page_start", "page_end", "text"} with
+    1-based page numbers; blank pages are skipped.
+    """
+    chunks = []
+    parts, page_start, page_end, tokens = [], None, None, 0
+
+    def flush():
+        if parts:
+            chunks.append({"index": len(chunks), "page_start": page_start, "page_end": page_end,
+                           "text": "\n".join(parts)})
+
+    for page_no, text in enumerate(pages, start=1):
+        if not text or not text.strip():
+            continue
+        for piece in _split_page(text.strip(), max_tokens):
+            piece_tokens = estimate_tokens(piece)
+            if parts and tokens + piece_tokens > max_tokens:
+                flush()
+                parts, page_start, tokens = [], None, 0
+            parts.append(piece)
+            page_start = page_no if page_start is None else page_start
+            page_end = page_no
+            tokens += piece_tokens
+    flush()
+    return chunks
+
+
+class PDFChunkAgent:
+    """
+    Map-reduce analysis of long PDFs: pages are packed into token-bounded
+    chunks, each chunk is summarised and mined for key points, parties,
+    dates and amounts concurrently, and the per-chunk answers are merged
+    in page order with the pages every item came from.
+    """
+
+    def __init__(self, groq_api_key: str, model_name: str = "llama-3.3-70b-versatile",
+                 max_chunk_tokens: int = 1500, max_concurrency: int = 8):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+
+        try:
+            self.llm = ChatGroq(
+                temperature=0,
+                api_key=groq_api_key,
+                model_name=model_name
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to initialize ChatGroq: {e}")
+            raise
+
+        self.output_parser = StrOutputParser()
+        self.prompt = ChatPromptTemplate.from_template(PDF_CHUNK_PROMPT)
+
+    def _analyze(self, chunk: dict, intent: str, deadline: float = None) -> dict:
+        """Map step: one LLM call for one chunk, timing out at deadline. Failures are returned, not raised"""
+        report = {"index": chunk["index"], "pages": [chunk["page_start"], chunk["page_end"]]}
+        start = time.perf_counter()
+        try:
+            chain = self.prompt | bind_deadline(self.llm, deadline) | self.output_parser
+            output = chain.invoke({
+                "page_start": chunk["page_start"],
+                "page_end": chunk["page_end"],
+                "intent": intent or "unknown",
+                "section_content": chunk["text"]
+            })
+            parser = IncrementalJSONParser()
+            parser.feed(output)
+            if not parser.fields:
+                report["error"] = "LLM returned unstructured output"
+                report["summary"] = output[:200]
+            else:
+                report.update(parser.fields)
+        except Exception as e:
+            self.logger.error(f"Chunk {chunk['index']} (pages {report['pages']}) failed: {e}")
+            report["error"] = str(e)
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        return report
+
+    @staticmethod
+    def _as_list(value) -> list:
+        if value is None or value == "":
+            return []
+        values = value if isinstance(value, list) else [value]
+        return [v if isinstance(v, str) else str(v) for v in values if v not in (None, "")]
+
+    def _merge(self, reports: list) -> dict:
+        """Reduce step: concatenate summaries and dedupe list items in chunk order, keeping page provenance"""
+        merged = {field: [] for field in LIST_FIELDS}
+        seen = {field: {} for field in LIST_FIELDS}
+        sections = []
+        for report in reports:
+            first, last = report["pages"]
+            pages = list(range(first, last + 1))
+            if report.get("summary"):
+                sections.append({"pages": report["pages"], "summary": str(report["summary"]).strip()})
+            for field in LIST_FIELDS:
+                for value in self._as_list(report.get(field)):
+                    key = " ".join(value.lower().split())
+                    if key in seen[field]:
+                        item = seen[field][key]
+                        item["pages"] = sorted(set(item["pages"]) | set(pages))
+                    else:
+                        item = {"value": value.strip(), "pages": pages}
+                        seen[field][key] = item
+                        merged[field].append(item)
+        merged["sections"] = sections
+        merged["summary"] = " ".join(section["summary"] for section in sections)
+        return merged
+
+    def process(self, pages: list, intent: str = None, deadline: float = None) -> dict:
+        """
+        Analyse a document given as per-page text. Chunks run concurrently
+        (up to max_concurrency), so latency tracks the slowest chunk rather
+        than the page count. Failed chunks are listed and left out of the merge.
+        Chunks unfinished at deadline (time.monotonic()) are cancelled and
+        listed in timed_out_chunks; the merge covers the rest.
+        """
+        start = time.perf_counter()
+        chunks = chunk_pages(pages, self.max_chunk_tokens)
+        if not chunks:
+            return {"error": "No text to analyse", "pages": len(pages), "chunks": []}
+
+        workers = min(self.max_concurrency, len(chunks))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-chunk")
+        futures = [executor.submit(self._analyze, chunk, intent, deadline) for chunk in chunks]
+        done, _ = wait(futures, timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+        # Don't block on calls that overran; they time out at the deadline and their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+        reports = [
+            future.result() if future in done else
+            {"index": chunk["index"], "pages": [chunk["page_start"], chunk["page_end"]],
+             "error": "deadline exceeded", "seconds": round(time.perf_counter() - start, 3)}
+            for chunk, future in zip(chunks, futures)
+        ]
+
+        result = self._merge([r for r in reports if "error" not in r])
+        result.update({
+            "pages": len(pages),
+            "chunks": [
+                {key: r[key] for key in ("index", "pages", "seconds", "error") if key in r}
+                for r in reports
+            ],
+            "failed_chunks": [r["index"] for r in reports if "error" in r],
+            "timed_out_chunks": [r["index"] for r in reports if r.get("error") == "deadline exceeded"],
+            "slowest_chunk_seconds": max(r["seconds"] for r in reports),
+            "seconds": round(time.perf_counter() - start, 3)
+        })
+        self.logger.info(
+            f"Analysed {len(pages)} pages in {len(chunks)} chunks "
+            f"({len(result['failed_chunks'])} failed) in {result['seconds']}s"
+        )
+        return result
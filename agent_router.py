@@ -1,13 +1,35 @@
 import os
+import re
+import json
 import logging
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from email.utils import parseaddr
 from Agents.classifier_agent import ClassifierAgent
 from Agents.json_agent import JSONAgent
-from Agents.email_agent import EmailAgent
+from Agents.email_agent import EmailAgent, REQUIRED_FIELDS
 from Agents.pdf_agent import PDFAgent
-from memory.memory import MemoryLogger
+from Agents.pdf_chunk_agent import PDFChunkAgent
+from Agents.model_cascade import DEFAULT_FAST_MODEL, DeadlineExceeded
+from memory.backend import create_memory
+from memory.dedup import MinHasher, LSHIndex
+from memory.blob_store import BlobStore
+from memory_tracker import PeakMemoryTracker
+
+# Share of the remaining latency budget given to classification; the agent stage gets the rest
+CLASSIFY_BUDGET_SHARE = 0.4
+# Seconds of the budget held back for blob storage and logging after the last LLM stage
+FINALIZE_RESERVE = 0.05
 
 class AgentRouter:
-    def __init__(self, groq_api_key: str = None):
+    def __init__(self, groq_api_key: str = None, dedup_threshold: float = 0.8,
+                 db_url: str = None, speculative: bool = False, blob_dir: str = None,
+                 blob_threshold: int = 16 * 1024, memory=None,
+                 fast_model_name: str = DEFAULT_FAST_MODEL, chunk_pdfs: bool = False,
+                 latency_budget: float = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         
         if not groq_api_key:
@@ -16,11 +38,34 @@ class AgentRouter:
                 raise ValueError("GROQ_API_KEY is required")
         
         try:
-            self.classifier = ClassifierAgent(groq_api_key=groq_api_key)
+            # fast_model_name=None disables the small-model-first cascade
+            if fast_model_name == DEFAULT_FAST_MODEL:
+                fast_model_name = os.getenv("GROQ_FAST_MODEL", fast_model_name) or None
+            self.classifier = ClassifierAgent(groq_api_key=groq_api_key, fast_model_name=fast_model_name)
             self.json_agent = JSONAgent()
-            self.email_agent = EmailAgent(groq_api_key=groq_api_key)
+            self.email_agent = EmailAgent(groq_api_key=groq_api_key, fast_model_name=fast_model_name)
             self.pdf_agent = PDFAgent()
-            self.memory = MemoryLogger()
+            self.pdf_chunk_agent = PDFChunkAgent(groq_api_key=groq_api_key)
+            self.chunk_pdfs = chunk_pdfs
+            # A caller-supplied StorageBackend (e.g. a queue to a writer process) wins over db_url
+            self.memory = memory or create_memory(db_url or os.getenv("MEMORY_DB_URL", "sqlite:///memory_logs.db"))
+            self.dedup_threshold = dedup_threshold
+            self.minhasher = MinHasher()
+            self.dedup_index = LSHIndex(num_perm=self.minhasher.num_perm)
+            # Loaded on a background thread so construction time doesn't grow with the history;
+            # until it finishes, lookups only see documents routed since
+            self._dedup_rebuild = self.dedup_index.rebuild(self.memory.iter_signatures(), background=True)
+            self.blobs = BlobStore(blob_dir or os.getenv("BLOB_STORE_DIR", "blobs"), blob_threshold)
+            self.speculative = speculative
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+            self._speculation_lock = threading.Lock()
+            self.speculation_stats = {"attempts": 0, "hits": 0, "misses": 0, "saved_seconds": 0.0}
+            self.latency_budget = latency_budget
+            # Calls that overrun a budget are abandoned, not joined; each LLM request times out
+            # at its deadline, so an abandoned call frees its thread shortly after
+            self._deadline_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="deadline")
+            self._deadline_lock = threading.Lock()
+            self.deadline_stats = {"requests": 0, "within_budget": 0, "degraded": 0, "stage_timeouts": {}}
             self.logger.info("All agents initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize agents: {e}")
@@ -54,21 +99,357 @@ class AgentRouter:
         
         return "EMAIL"  # Default fallback
 
-    def route(self, source_name: str, raw_bytes: bytes = None, raw_text: str = None):
+    def _detect_intent_from_content(self, text: str) -> str:
+        """Keyword guess at the intent, used when the LLM can't answer in time"""
+        text_lower = (text or "").lower()
+        intent_keywords = [
+            ("Complaint", ["complaint", "complain", "damaged", "defective", "unacceptable", "refund"]),
+            ("RFQ", ["request for quotation", "rfq", "quotation", "quote"]),
+            ("Invoice", ["invoice", "amount due", "payment due", "total_amount", "remit"]),
+            ("Regulation", ["regulation", "compliance", "directive", "gdpr"]),
+        ]
+        for intent, keywords in intent_keywords:
+            if any(keyword in text_lower for keyword in keywords):
+                return intent
+        return "General Enquiry"
+
+    def _heuristic_email(self, text: str, fields: dict):
+        """
+        Fill email fields the LLM did not deliver from the headers and body.
+        Returns (result, names of the fields that were guessed)
+        """
+        def header(name):
+            match = re.search(rf"^\s*{name}:\s*(.+)$", text or "", re.I | re.M)
+            return match.group(1).strip() if match else ""
+
+        sender_name, sender_email = parseaddr(header("From"))
+        first_line = next((line.strip() for line in (text or "").splitlines() if line.strip()), "")
+        urgent = any(word in (text or "").lower() for word in ("urgent", "asap", "immediately", "unacceptable"))
+        guesses = {
+            "sender_name": sender_name,
+            "sender_email": sender_email,
+            "urgency": "High" if urgent else "Medium",
+            "summary": header("Subject") or first_line[:200],
+            "action": ""
+        }
+        result, guessed = {}, []
+        for field in REQUIRED_FIELDS:
+            if field in fields:
+                result[field] = fields[field]
+            else:
+                result[field] = guesses[field]
+                guessed.append(field)
+        return result, guessed
+
+    def _await(self, future, deadline: float):
+        """(True, value) if future finishes by deadline, else cancel it and return (False, None)"""
+        try:
+            return True, future.result(timeout=max(deadline - time.monotonic(), 0))
+        except (FutureTimeout, DeadlineExceeded):
+            future.cancel()
+            return False, None
+
+    def _classify_with_deadline(self, text: str, source_name: str, is_pdf: bool, deadline: float):
+        """
+        Classify format and intent concurrently within CLASSIFY_BUDGET_SHARE
+        of the remaining budget; labels not ready by then come from the
+        content heuristics. Returns (classification, degraded field names)
+        """
+        now = time.monotonic()
+        stage_deadline = now + max(deadline - now, 0) * CLASSIFY_BUDGET_SHARE
+        futures = {}
+        if stage_deadline > now:
+            futures["format"] = self._deadline_executor.submit(
+                self.classifier.classify_format, text, deadline=stage_deadline
+            )
+            futures["intent"] = self._deadline_executor.submit(
+                self.classifier.classify_intent, text, deadline=stage_deadline
+            )
+
+        degraded = []
+        ok, fmt = self._await(futures["format"], stage_deadline) if futures else (False, None)
+        if not ok:
+            fmt = "PDF" if is_pdf else self._detect_format_from_content(text, source_name)
+            degraded.append("format")
+        ok, intent = self._await(futures["intent"], stage_deadline) if futures else (False, None)
+        if not ok:
+            intent = self._detect_intent_from_content(text)
+            degraded.append("intent")
+        return {"format": fmt, "intent": intent}, degraded
+
+    def _parse_email_with_deadline(self, text: str, on_field, deadline: float):
+        """
+        Email extraction that stops at deadline. Fields streamed before
+        then are kept and the rest are guessed locally; fast-model fields
+        are only streamed once they have been checked (see
+        EmailAgent.parse_email). Streamed fields are
+        handed back through a queue so on_field runs on the calling thread
+        (where e.g. Streamlit's script context lives); anything the worker
+        produces after this returns is dropped.
+        Returns (result, degraded field names)
+        """
+        fields = {}
+        streamed = queue.Queue()
+        finished = threading.Event()
+
+        def collect(field, value):
+            if not finished.is_set():
+                streamed.put((field, value))
+
+        ok, result = False, None
+        if deadline > time.monotonic():
+            future = self._deadline_executor.submit(
+                self.email_agent.parse_email, text, on_field=collect, deadline=deadline
+            )
+            # Marks the end of the stream; every field the agent sent is queued before it
+            future.add_done_callback(lambda _: streamed.put(None))
+            while True:
+                try:
+                    item = streamed.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                field, value = item
+                fields[field] = value
+                if on_field:
+                    try:
+                        on_field(field, value)
+                    except Exception as e:
+                        self.logger.warning(f"on_field callback failed: {e}")
+            finished.set()
+            ok, result = self._await(future, deadline)
+        if ok:
+            return result, []
+        result, guessed = self._heuristic_email(text, dict(fields))
+        return result, [f"result.{field}" for field in guessed]
+
+    def _record_deadline(self, budget: float, elapsed: float, degraded: list):
+        with self._deadline_lock:
+            stats = self.deadline_stats
+            stats["requests"] += 1
+            stats["within_budget"] += elapsed <= budget
+            stats["degraded"] += bool(degraded)
+            stages = {
+                "pdf_analysis" if field == "result.analysis" else "email" if field.startswith("result.") else field
+                for field in degraded
+            }
+            for stage in stages:
+                stats["stage_timeouts"][stage] = stats["stage_timeouts"].get(stage, 0) + 1
+
+    def get_deadline_stats(self):
+        """How often budgeted requests finished in time and how often a stage hit its deadline"""
+        with self._deadline_lock:
+            stats = dict(self.deadline_stats, stage_timeouts=dict(self.deadline_stats["stage_timeouts"]))
+        requests = stats["requests"]
+        stats["budget_met_rate"] = stats["within_budget"] / requests if requests else 0.0
+        stats["deadline_hit_rate"] = stats["degraded"] / requests if requests else 0.0
+        return stats
+
+    def _predict_format(self, text: str, source_name: str = "", is_pdf: bool = False):
+        """
+        Heuristic format guess plus whether it is confident enough to
+        start the matching agent before the LLM has confirmed it
+        """
+        if is_pdf:
+            return "PDF", True
+        fmt = self._detect_format_from_content(text, source_name)
+        stripped = (text or "").strip()
+        if fmt == "JSON":
+            try:
+                json.loads(stripped)
+                return fmt, True
+            except ValueError:
+                return fmt, False
+        if fmt == "EMAIL":
+            header = stripped[:500].lower()
+            confident = header.startswith(("from:", "to:", "subject:")) and "subject:" in header
+            return fmt, confident
+        return fmt, False
+
+    @staticmethod
+    def _timed(fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        return value, time.perf_counter() - start
+
+    def _classify_speculative(self, text: str, source_name: str, is_pdf: bool, on_field):
+        """
+        Run format and intent classification concurrently and, when the
+        heuristic is confident, start the predicted agent alongside them.
+        Only agents that don't need the intent (the email LLM call) are
+        started early; JSON and PDF processing are local and cheap.
+        Fields the speculative agent streams are held in a queue until
+        _resolve_speculation confirms the format.
+        """
+        started = time.perf_counter()
+        predicted, confident = self._predict_format(text, source_name, is_pdf=is_pdf)
+
+        format_future = self._executor.submit(self._timed, self.classifier.classify_format, text)
+        intent_future = self._executor.submit(self._timed, self.classifier.classify_intent, text)
+        agent_future, streamed = None, None
+        if confident and predicted == "EMAIL":
+            collect = None
+            if on_field:
+                streamed = queue.Queue()
+
+                def collect(field, value):
+                    streamed.put((field, value))
+            agent_future = self._executor.submit(
+                self._timed, self.email_agent.parse_email, text, on_field=collect
+            )
+            if streamed is not None:
+                # Marks the end of the stream; every field the agent sent is queued before it
+                agent_future.add_done_callback(lambda _: streamed.put(None))
+
+        fmt, format_secs = format_future.result()
+        intent, intent_secs = intent_future.result()
+        speculation = {
+            "predicted": predicted,
+            "confident": confident,
+            "future": agent_future,
+            "fields": streamed,
+            "started": started,
+            "classify_seconds": format_secs + intent_secs
+        }
+        return {"format": fmt, "intent": intent}, speculation
+
+    def _resolve_speculation(self, speculation: dict, fmt: str, on_field=None):
+        """
+        Return the speculative agent result if the prediction held,
+        otherwise cancel or discard it. On a hit the buffered fields are
+        passed to on_field on the calling thread as they arrive; on a
+        miss they are dropped. Returns (result or None, report)
+        """
+        future = speculation["future"]
+        report = {"predicted": speculation["predicted"], "confident": speculation["confident"]}
+        if future is None:
+            # Classification still ran in parallel, which is its own saving
+            saved = max(speculation["classify_seconds"] - (time.perf_counter() - speculation["started"]), 0.0)
+            with self._speculation_lock:
+                self.speculation_stats["saved_seconds"] += saved
+            report.update({"hit": None, "saved_ms": round(saved * 1000, 1)})
+            return None, report
+
+        with self._speculation_lock:
+            self.speculation_stats["attempts"] += 1
+
+        if speculation["predicted"] != fmt:
+            if not future.cancel():
+                self.logger.info("Discarding speculative agent result after format mismatch")
+            with self._speculation_lock:
+                self.speculation_stats["misses"] += 1
+            report.update({"hit": False, "saved_ms": 0.0})
+            return None, report
+
+        if speculation["fields"] is not None and on_field:
+            for field, value in iter(speculation["fields"].get, None):
+                try:
+                    on_field(field, value)
+                except Exception as e:
+                    self.logger.warning(f"on_field callback failed: {e}")
+        result, agent_secs = future.result()
+        wall = time.perf_counter() - speculation["started"]
+        saved = max(speculation["classify_seconds"] + agent_secs - wall, 0.0)
+        with self._speculation_lock:
+            self.speculation_stats["hits"] += 1
+            self.speculation_stats["saved_seconds"] += saved
+        report.update({"hit": True, "saved_ms": round(saved * 1000, 1)})
+        return result, report
+
+    def _externalize(self, raw_input, result: dict, is_path: bool = False):
+        """Store the raw input and any large extracted text as blobs"""
+        if is_path:
+            large = os.path.getsize(raw_input) >= self.blobs.threshold_bytes
+            input_ref = self.blobs.put_file(raw_input) if large else None
+        else:
+            input_ref = self.blobs.put(raw_input) if self.blobs.should_store(raw_input) else None
+        if isinstance(result, dict) and self.blobs.should_store(result.get("raw_text")):
+            result = dict(result)
+            result["raw_text_ref"] = self.blobs.put(result.pop("raw_text"))
+        return input_ref, result
+
+    def load_blob(self, ref: dict, limit: int = None) -> str:
+        """Fetch externalized text on demand (optionally just the first `limit` bytes)"""
+        return self.blobs.read_text(ref, limit=limit)
+
+    def get_model_stats(self):
+        """Per-tier LLM call counts and latencies for the model cascade"""
+        return {
+            "classifier": self.classifier.cascade_stats.snapshot(),
+            "email": self.email_agent.cascade_stats.snapshot()
+        }
+
+    def get_speculation_stats(self):
+        """Hit rate and total latency saved by speculative execution"""
+        with self._speculation_lock:
+            stats = dict(self.speculation_stats)
+        stats["hit_rate"] = stats["hits"] / stats["attempts"] if stats["attempts"] else 0.0
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        return stats
+
+    def find_near_duplicate(self, text: str, signature: bytes = None, threshold: float = None):
+        """
+        Look up the most similar previously routed document.
+        Returns (LogEntry, similarity) or None; text without word
+        tokens never matches
+        """
+        if signature is None:
+            signature = self.minhasher.signature(text)
+        if signature is None:
+            return None
+        match = self.dedup_index.query(
+            signature, threshold if threshold is not None else self.dedup_threshold
+        )
+        if not match:
+            return None
+        entry = self.memory.fetch_by_id(match[0])
+        if entry is None:
+            self.dedup_index.remove(match[0])
+            return None
+        return entry, match[1]
+
+    def route(self, source_name: str, raw_bytes: bytes = None, raw_text: str = None, on_field=None,
+              speculative: bool = None, raw_path: str = None, chunk_pdf: bool = None,
+              latency_budget: float = None):
         """
         Main routing method:
-        - If raw_bytes is provided, assume PDF
+        - If raw_bytes or raw_path is provided, assume PDF
         - Else use raw_text for JSON or Email
+        - on_field(name, value) receives email fields as they stream in
+        - speculative overrides the router-wide speculative mode
+        - chunk_pdf overrides chunk_pdfs: PDFs also get a map-reduce
+          LLM analysis (result["analysis"]) over page-bounded chunks
+        - latency_budget (seconds) overrides the router-wide budget: LLM
+          stages that would overrun are cancelled and their fields filled
+          by local heuristics, listed in response["degraded"]
         """
+        if speculative is None:
+            speculative = self.speculative
+        if chunk_pdf is None:
+            chunk_pdf = self.chunk_pdfs
+        if latency_budget is None:
+            latency_budget = self.latency_budget
+        started = time.monotonic()
+        deadline = started + max(latency_budget - FINALIZE_RESERVE, 0) if latency_budget else None
+        degraded = []
+        pages = None
         try:
             # Input validation
-            if not raw_bytes and not raw_text:
-                raise ValueError("Either raw_bytes or raw_text must be provided")
+            if not raw_bytes and not raw_text and not raw_path:
+                raise ValueError("Either raw_bytes, raw_path or raw_text must be provided")
             
-            if raw_bytes:
+            is_pdf = bool(raw_bytes or raw_path)
+            if is_pdf:
                 # PDF path - extract text first
                 try:
-                    text = self.pdf_agent.extract_text(raw_bytes)
+                    if chunk_pdf:
+                        pages = self.pdf_agent.extract_pages(pdf_bytes=raw_bytes, path=raw_path)
+                        text = "\n".join(pages)
+                    elif raw_path:
+                        text = self.pdf_agent.extract_text_from_file(raw_path)
+                    else:
+                        text = self.pdf_agent.extract_text(raw_bytes)
                 except Exception as e:
                     self.logger.error(f"PDF text extraction failed: {e}")
                     return {
@@ -80,9 +461,48 @@ class AgentRouter:
             else:
                 text = raw_text
 
+            # Near-duplicate lookup: reuse the prior classification when the
+            # matched document came in through the same (PDF vs text) path
+            signature = None
+            duplicate = None
+            try:
+                signature = self.minhasher.signature(text)
+                if signature is not None:
+                    duplicate = self.find_near_duplicate(text, signature=signature)
+            except Exception as e:
+                self.logger.warning(f"Near-duplicate lookup failed: {e}")
+
+            near_duplicate = None
+            if duplicate:
+                entry, similarity = duplicate
+                near_duplicate = {
+                    "id": entry.id,
+                    "source": entry.source,
+                    "similarity": round(similarity, 3),
+                    "format": entry.format,
+                    "intent": entry.intent
+                }
+                if (entry.format == "PDF") != is_pdf:
+                    duplicate = None
+
             # Classify format and intent
+            speculation = None
             try:
-                classification = self.classifier.classify(text)
+                if duplicate:
+                    self.logger.info(f"Reusing classification of near-duplicate {near_duplicate['id']}")
+                    classification = {
+                        "format": near_duplicate["format"],
+                        "intent": near_duplicate["intent"],
+                        "reused_from": near_duplicate["id"]
+                    }
+                elif deadline is not None and text and text.strip():
+                    classification, degraded = self._classify_with_deadline(text, source_name, is_pdf, deadline)
+                elif speculative and text and text.strip():
+                    classification, speculation = self._classify_speculative(
+                        text, source_name, is_pdf, on_field
+                    )
+                else:
+                    classification = self.classifier.classify(text)
                 fmt = classification["format"]
                 intent = classification["intent"]
             except Exception as e:
@@ -93,38 +513,87 @@ class AgentRouter:
                 classification = {"format": fmt, "intent": intent}
 
             # Route to appropriate agent
+            speculative_result, speculation_report = None, None
+            if speculation:
+                try:
+                    speculative_result, speculation_report = self._resolve_speculation(speculation, fmt, on_field)
+                except Exception as e:
+                    self.logger.warning(f"Speculative agent run failed, re-running: {e}")
             try:
-                if fmt == "JSON":
+                if speculative_result is not None:
+                    result = speculative_result
+                elif fmt == "JSON":
                     result = self.json_agent.process(text, intent)
+                elif fmt == "EMAIL" and deadline is not None:
+                    result, missed = self._parse_email_with_deadline(text, on_field, deadline)
+                    degraded.extend(missed)
                 elif fmt == "EMAIL":
-                    result = self.email_agent.parse_email(text)
+                    result = self.email_agent.parse_email(text, on_field=on_field)
                 elif fmt == "PDF":
                     # We already extracted text; pass bytes and intent
-                    result = self.pdf_agent.process(raw_bytes, intent)
+                    result = self.pdf_agent.process(raw_bytes, intent, text=text)
+                    if pages is not None:
+                        result["analysis"] = self.pdf_chunk_agent.process(pages, intent, deadline=deadline)
+                        if result["analysis"].get("timed_out_chunks"):
+                            degraded.append("result.analysis")
                 else:
                     result = {"error": f"Unknown format: {fmt}"}
             except Exception as e:
                 self.logger.error(f"Agent processing failed: {e}")
                 result = {"error": f"Processing failed: {str(e)}"}
 
+            # Move large bodies to the blob store so rows and responses carry only references
+            input_ref = None
+            try:
+                input_ref, result = self._externalize(raw_bytes or raw_path or text, result,
+                                                      is_path=bool(raw_path))
+            except Exception as e:
+                self.logger.warning(f"Blob store write failed, keeping bodies inline: {e}")
+
             # Log to memory
             try:
-                self.memory.log_entry(
+                payload = {"classification": classification, "result": result}
+                if input_ref:
+                    payload["input_ref"] = input_ref
+                if degraded:
+                    payload["degraded"] = degraded
+                entry_id = self.memory.log_entry(
                     source=source_name,
                     format_type=fmt,
                     intent=intent,
-                    payload={"classification": classification, "result": result}
+                    payload=payload,
+                    minhash=signature,
+                    search_text=text if "raw_text_ref" in result else None
                 )
+                # Heuristic labels must not be reused for later near-duplicates
+                if entry_id and signature and not {"format", "intent"} & set(degraded):
+                    self.dedup_index.add(entry_id, signature)
             except Exception as e:
                 self.logger.warning(f"Memory logging failed: {e}")
 
             # Return result
-            return {
+            response = {
                 "source": source_name,
                 "format": fmt,
                 "intent": intent,
                 "result": result
             }
+            if input_ref:
+                response["input_ref"] = input_ref
+            if near_duplicate:
+                response["near_duplicate"] = near_duplicate
+            if speculation_report:
+                response["speculation"] = speculation_report
+            if deadline is not None:
+                elapsed = time.monotonic() - started
+                self._record_deadline(latency_budget, elapsed, degraded)
+                response["degraded"] = degraded
+                response["deadline"] = {
+                    "budget_ms": round(latency_budget * 1000, 1),
+                    "elapsed_ms": round(elapsed * 1000, 1),
+                    "met": elapsed <= latency_budget
+                }
+            return response
             
         except Exception as e:
             self.logger.error(f"Routing failed: {e}")
@@ -135,6 +604,94 @@ class AgentRouter:
                 "result": {"error": f"Routing failed: {str(e)}"}
             }
 
+    @staticmethod
+    def _looks_like_pdf(source_name: str, head: bytes) -> bool:
+        return head.startswith(b"%PDF-") or (source_name or "").lower().endswith(".pdf")
+
+    @staticmethod
+    def _decode_error(source_name: str) -> dict:
+        return {
+            "source": source_name,
+            "format": "Unknown",
+            "intent": "Unknown",
+            "result": {"error": "Unable to decode file. Please ensure it's a valid text file."}
+        }
+
+    def _tracked(self, track_memory: bool, fn, *args, **kwargs):
+        """Run fn, attaching peak RSS growth to its result when track_memory is set"""
+        if not track_memory:
+            return fn(*args, **kwargs)
+        with PeakMemoryTracker() as tracker:
+            out = fn(*args, **kwargs)
+        out["memory"] = tracker.report()
+        return out
+
+    def _route_path(self, path: str, source_name: str, **kwargs):
+        try:
+            with open(path, "rb") as f:
+                head = f.read(5)
+            if self._looks_like_pdf(source_name, head):
+                return self.route(source_name, raw_path=path, **kwargs)
+            with open(path, "r", encoding="utf-8") as f:
+                raw_text = f.read()
+        except UnicodeDecodeError:
+            return self._decode_error(source_name)
+        except OSError as e:
+            self.logger.error(f"Failed to read {path}: {e}")
+            return {
+                "source": source_name,
+                "format": "Unknown",
+                "intent": "Unknown",
+                "result": {"error": f"Failed to read file: {str(e)}"}
+            }
+        return self.route(source_name, raw_text=raw_text, **kwargs)
+
+    def _route_buffer(self, data: bytes, source_name: str, **kwargs):
+        if self._looks_like_pdf(source_name, data):
+            return self.route(source_name, raw_bytes=data, **kwargs)
+        try:
+            raw_text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return self._decode_error(source_name)
+        return self.route(source_name, raw_text=raw_text, **kwargs)
+
+    def route_file(self, path: str, source_name: str = None, track_memory: bool = False, **kwargs):
+        """
+        Route a document on disk. PDFs are opened by PyMuPDF straight
+        from the file; text documents are read and decoded as UTF-8.
+        With track_memory, the result carries the peak RSS growth seen
+        while routing this document.
+        """
+        source_name = source_name or os.path.basename(path)
+        return self._tracked(track_memory, self._route_path, path, source_name, **kwargs)
+
+    def route_stream(self, stream, source_name: str, spool_threshold: int = 8 * 1024 * 1024,
+                     track_memory: bool = False, **kwargs):
+        """
+        Route a file-like object. Inputs up to spool_threshold bytes are
+        handled in memory; larger ones are copied to a temporary file in
+        chunks and routed from disk via route_file.
+        """
+        head = stream.read(spool_threshold + 1)
+        if isinstance(head, str):
+            head = head.encode("utf-8")
+        if len(head) <= spool_threshold:
+            return self._tracked(track_memory, self._route_buffer, head, source_name, **kwargs)
+
+        fd, spool_path = tempfile.mkstemp(prefix="route-spool-", suffix=os.path.splitext(source_name)[1])
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                spool.write(head)
+                del head
+                for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+                    if not chunk:
+                        break
+                    spool.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            self.logger.info(f"Spooled {source_name} to {spool_path}")
+            return self.route_file(spool_path, source_name=source_name, track_memory=track_memory, **kwargs)
+        finally:
+            os.remove(spool_path)
+
     def get_memory_stats(self):
         """Get memory statistics"""
         try:
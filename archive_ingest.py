@@ -0,0 +1,309 @@
+"""
+Bulk ingestion of mail exports: streams messages out of mbox archives
+and members out of zip bundles (.eml, .json, .pdf, .txt) and routes
+them through AgentRouter on a thread pool. Progress is checkpointed so
+an interrupted run resumes where it stopped.
+
+    python -m archive_ingest export.mbox bundle.zip --workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email import policy
+from email.parser import BytesParser
+
+ZIP_MEMBER_TYPES = (".eml", ".json", ".pdf", ".txt")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def is_archive(name: str) -> bool:
+    return (name or "").lower().endswith((".mbox", ".mbx", ".zip"))
+
+
+def message_to_text(raw: bytes) -> str:
+    """
+    Render an RFC 822 message as the plain "From:/Subject:" text the
+    email agent is prompted with: decoded headers, then the text body
+    (HTML stripped when there is no plain part) and attachment names.
+    """
+    msg = BytesParser(policy=policy.default).parsebytes(raw)
+    lines = [f"{name}: {msg[name]}" for name in ("From", "To", "Cc", "Date", "Subject") if msg[name]]
+
+    body = msg.get_body(preferencelist=("plain", "html"))
+    content = ""
+    if body is not None:
+        try:
+            content = body.get_content()
+        except (LookupError, ValueError):
+            # Unknown or lying charset: keep what decodes
+            content = (body.get_payload(decode=True) or b"").decode("utf-8", errors="replace")
+        if body.get_content_type() == "text/html":
+            content = _TAG_RE.sub(" ", content)
+
+    attachments = [part.get_filename() for part in msg.iter_attachments() if part.get_filename()]
+    if attachments:
+        lines.append(f"Attachments: {', '.join(attachments)}")
+    return "\n".join(lines) + "\n\n" + content.strip()
+
+
+def iter_mbox(path: str, start_offset: int = 0):
+    """
+    Yield (offset, end_offset, raw_message) for each message of an mbox
+    file, reading line by line from start_offset. A message starts at a
+    "From " line at the top of the file or after a blank line; quoted
+    ">From " lines are unescaped.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        start, lines = None, []
+        prev_blank = True
+        for line in f:
+            if prev_blank and line.startswith(b"From "):
+                if start is not None:
+                    yield start, offset, b"".join(lines)
+                start, lines = offset, []
+            elif start is not None:
+                quoted = line.startswith(b">") and line.lstrip(b">").startswith(b"From ")
+                lines.append(line[1:] if quoted else line)
+            prev_blank = line in (b"\n", b"\r\n")
+            offset += len(line)
+        if start is not None:
+            yield start, offset, b"".join(lines)
+
+
+class ArchiveIngestor:
+    """
+    Routes every message of an archive through one AgentRouter with
+    `workers` threads. At most max_in_flight messages are routed at once,
+    and at most max_window (default 4x that) are held in memory, the
+    finished ones waiting for a slower earlier message so results and
+    checkpoints stay in archive order. The checkpoint records the offset below which every message
+    has been routed (a byte offset for mbox, a member index for zip), so
+    out-of-order completion never skips a message on resume.
+    """
+
+    def __init__(self, router, workers: int = 8, max_in_flight: int = None, checkpoint_every: int = 50,
+                 max_window: int = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.router = router
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * 2
+        self.max_window = max(max_window or self.max_in_flight * 4, self.max_in_flight)
+        self.checkpoint_every = checkpoint_every
+
+    @staticmethod
+    def default_checkpoint_path(archive_path: str, checkpoint_dir: str = None) -> str:
+        if checkpoint_dir:
+            return os.path.join(checkpoint_dir, os.path.basename(archive_path) + ".checkpoint.json")
+        return archive_path + ".checkpoint.json"
+
+    def load_checkpoint(self, archive_path: str, checkpoint_path: str) -> dict:
+        """Saved progress for this archive, or a fresh start if missing or stale"""
+        fresh = {"offset": 0, "index": 0, "processed": 0, "errors": 0, "skipped": 0, "complete": False}
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return fresh
+        try:
+            with open(checkpoint_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+            return fresh
+
+        size = os.path.getsize(archive_path)
+        # mbox exports may grow by appending; anything else means a different archive
+        grew = archive_path.lower().endswith((".mbox", ".mbx")) and size >= state.get("offset", 0)
+        if state.get("size") != size and not grew:
+            self.logger.warning(f"{archive_path} changed since checkpoint was written, starting over")
+            return fresh
+        fresh.update({key: state[key] for key in fresh if key in state})
+        if grew and size != state.get("size"):
+            fresh["complete"] = False
+        return fresh
+
+    def _save_checkpoint(self, checkpoint_path: str, archive_path: str, state: dict):
+        if not checkpoint_path:
+            return
+        state = dict(state, archive=os.path.abspath(archive_path), size=os.path.getsize(archive_path),
+                     updated=time.time())
+        directory = os.path.dirname(os.path.abspath(checkpoint_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".ckpt-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, checkpoint_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _mbox_items(self, path: str, name: str, offset: int, index: int):
+        for start, end, raw in iter_mbox(path, offset):
+            source = f"{name}::{index}@{start}"
+            yield start, end, index, source, (lambda raw=raw, source=source: self._route_message(raw, source))
+            index += 1
+
+    def _zip_items(self, archive: zipfile.ZipFile, name: str, offset: int):
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        for index in range(offset, len(members)):
+            info = members[index]
+            source = f"{name}::{info.filename}"
+            if not info.filename.lower().endswith(ZIP_MEMBER_TYPES):
+                yield index, index + 1, index, source, None
+                continue
+            yield index, index + 1, index, source, (
+                lambda info=info, source=source: self._route_member(archive, info, source)
+            )
+
+    def _route_message(self, raw: bytes, source: str) -> dict:
+        try:
+            text = message_to_text(raw)
+        except Exception as e:
+            self.logger.warning(f"Could not parse {source} as MIME, routing raw text: {e}")
+            text = raw.decode("utf-8", errors="replace")
+        return self.router.route(source, raw_text=text)
+
+    def _route_member(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo, source: str) -> dict:
+        if info.filename.lower().endswith(".eml"):
+            with archive.open(info) as member:
+                return self._route_message(member.read(), source)
+        # PDFs and large JSON are spooled to disk by route_stream rather than held in memory
+        with archive.open(info) as member:
+            return self.router.route_stream(member, source)
+
+    def ingest(self, archive_path: str, checkpoint_path: str = None, start_offset: int = None,
+               on_result=None, archive_name: str = None) -> dict:
+        """
+        Route every message or member of an mbox/zip archive, resuming
+        from checkpoint_path (or start_offset, which overrides it).
+        on_result(source, result) is called in archive order. Sources are
+        named "<archive_name>::<member>", archive_name defaulting to the
+        file's basename.
+        Returns a run summary.
+        """
+        state = self.load_checkpoint(archive_path, checkpoint_path)
+        if start_offset is not None:
+            state.update(offset=start_offset, complete=False)
+        if state["complete"]:
+            self.logger.info(f"{archive_path} already fully ingested")
+            return dict(state, archive=archive_path, routed=0, seconds=0.0)
+
+        is_zip = zipfile.is_zipfile(archive_path)
+        archive_name = archive_name or os.path.basename(archive_path)
+        started = time.perf_counter()
+        routed = 0
+        window = OrderedDict()  # offset -> (end_offset, index, source, future or None)
+        in_flight = set()
+
+        def drain():
+            """Advance the checkpoint over the finished prefix of the window"""
+            nonlocal routed
+            advanced = 0
+            while window:
+                offset, (end, index, source, future) = next(iter(window.items()))
+                if future is not None and (not future.done() or future.cancelled()):
+                    break
+                window.popitem(last=False)
+                if future is None:
+                    state["skipped"] += 1
+                else:
+                    try:
+                        out = future.result()
+                    except Exception as e:
+                        out = {"source": source, "format": "Unknown", "intent": "Unknown",
+                               "result": {"error": f"Routing failed: {e}"}}
+                    routed += 1
+                    state["processed"] += 1
+                    state["errors"] += "error" in out.get("result", {})
+                    if on_result:
+                        on_result(source, out)
+                state.update(offset=end, index=index + 1)
+                advanced += 1
+            if advanced and (state["processed"] % self.checkpoint_every < advanced or not window):
+                self._save_checkpoint(checkpoint_path, archive_path, state)
+
+        archive = zipfile.ZipFile(archive_path) if is_zip else None
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="archive-ingest")
+        try:
+            if is_zip:
+                items = self._zip_items(archive, archive_name, state["offset"])
+            else:
+                items = self._mbox_items(archive_path, archive_name, state["offset"], state["index"])
+            for offset, end, index, source, task in items:
+                # Stop reading ahead while routing is saturated or a slow message holds up the window
+                while in_flight and (len(in_flight) >= self.max_in_flight or len(window) >= self.max_window):
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    in_flight.difference_update(done)
+                    drain()
+                future = executor.submit(task) if task else None
+                if future is not None:
+                    in_flight.add(future)
+                window[offset] = (end, index, source, future)
+            wait(in_flight)
+            drain()
+            state["complete"] = True
+        except BaseException:
+            # Interrupted: keep whatever finished contiguously so resume loses nothing
+            executor.shutdown(wait=True, cancel_futures=True)
+            drain()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            if archive is not None:
+                archive.close()
+            self._save_checkpoint(checkpoint_path, archive_path, state)
+
+        elapsed = time.perf_counter() - started
+        self.logger.info(f"Ingested {routed} items from {archive_path} in {elapsed:.1f}s")
+        return dict(state, archive=archive_path, routed=routed, seconds=round(elapsed, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route every message in mbox archives and zip bundles")
+    parser.add_argument("archives", nargs="+")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--checkpoint-dir", help="where to keep checkpoints (default: next to each archive)")
+    parser.add_argument("--start-offset", type=int,
+                        help="resume from this byte offset (mbox) or member index (zip) instead of the checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore existing checkpoints")
+    parser.add_argument("--db-url", default=os.getenv("MEMORY_DB_URL", "sqlite:///memory_logs.db"))
+    parser.add_argument("--stub-llm-latency", type=float,
+                        help="use the offline stub LLM with this latency instead of Groq")
+    parser.add_argument("--verbose", action="store_true", help="print one line per routed item")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key and args.stub_llm_latency is None:
+        parser.error("GROQ_API_KEY is not set (use --stub-llm-latency for an offline run)")
+
+    logging.basicConfig(level=logging.INFO)
+    from agent_router import AgentRouter
+
+    router = AgentRouter(groq_api_key=api_key or "stub", db_url=args.db_url)
+    if args.stub_llm_latency is not None:
+        from benchmarks.stub_llm import install_stub
+        install_stub(router, latency=args.stub_llm_latency)
+    ingestor = ArchiveIngestor(router, workers=args.workers)
+
+    def print_result(source, out):
+        print(json.dumps({"source": source, "format": out["format"], "intent": out["intent"],
+                          "error": out.get("result", {}).get("error")}))
+
+    for path in args.archives:
+        checkpoint = ingestor.default_checkpoint_path(path, args.checkpoint_dir)
+        if args.restart and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        summary = ingestor.ingest(path, checkpoint_path=checkpoint, start_offset=args.start_offset,
+                                  on_result=print_result if args.verbose else None)
+        print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
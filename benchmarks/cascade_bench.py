@@ -0,0 +1,67 @@
+"""
+Latency and per-tier call counts with and without the model cascade,
+using the synthetic corpus and stub models for both tiers.
+
+    python -m benchmarks.cascade_bench --count 200 --large-latency 0.4 --fast-latency 0.08 --fast-error-rate 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from agent_router import AgentRouter
+from benchmarks.corpus import generate_corpus
+from benchmarks.load_test import load_manifest, run_load
+from benchmarks.stub_llm import install_stub
+from Agents.model_cascade import DEFAULT_FAST_MODEL
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare routing with and without the model cascade")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--mix", default="email=0.5,json=0.3,pdf=0.2")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--large-latency", type=float, default=0.4)
+    parser.add_argument("--fast-latency", type=float, default=0.08)
+    parser.add_argument("--fast-error-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    workdir = tempfile.mkdtemp(prefix="cascade_bench_")
+    try:
+        corpus_dir = os.path.join(workdir, "corpus")
+        generate_corpus(corpus_dir, count=args.count, mix=args.mix)
+        records = load_manifest(corpus_dir)
+
+        report = {}
+        for label, fast_model in (("large_only", None), ("cascade", DEFAULT_FAST_MODEL)):
+            storage_dir = os.path.join(workdir, label)
+            os.makedirs(storage_dir)
+            router = AgentRouter(
+                groq_api_key="stub",
+                db_url=f"sqlite:///{os.path.join(storage_dir, 'memory_logs.db')}",
+                blob_dir=os.path.join(storage_dir, "blobs"),
+                fast_model_name=fast_model,
+                # Keep every document on the LLM path so the tiers are compared fairly
+                dedup_threshold=1.1
+            )
+            install_stub(router, latency=args.large_latency, fast_latency=args.fast_latency,
+                         fast_error_rate=args.fast_error_rate)
+            run = run_load(router, corpus_dir, records, 0, args.concurrency, storage_dir)
+            router.memory.close()
+            report[label] = {
+                "throughput_docs_per_sec": run["throughput_docs_per_sec"],
+                "latency_ms": run["latency_ms"],
+                "format_accuracy": run["format_accuracy"],
+                "intent_accuracy": run["intent_accuracy"],
+                "tiers": router.get_model_stats()
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
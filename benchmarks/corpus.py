@@ -0,0 +1,217 @@
+"""
+Synthetic corpus generator: emails, Invoice/RFQ/Complaint JSON (with
+invalid variants) and multi-page PDFs.
+
+    python -m benchmarks.corpus --out corpus --count 1000 --mix email=0.5,json=0.3,pdf=0.2
+"""
+import argparse
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("corpus")
+
+COMPANIES = ["ACME Corp", "Globex", "Initech", "Umbrella Ltd", "Stark Industries", "Wayne Enterprises",
+             "Hooli", "Vandelay Imports", "Soylent Co", "Tyrell Systems"]
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy"]
+LAST_NAMES = ["Smith", "Jones", "Patel", "Garcia", "Chen", "Müller", "Okafor", "Rossi", "Kim", "Novak"]
+PRODUCTS = ["steel bolts M8", "hydraulic pump", "LED panel 60x60", "copper cable 2.5mm", "safety gloves",
+            "industrial fan", "pallet wrap", "laser printer toner", "server rack 42U", "office chair"]
+ISSUES = ["arrived damaged", "was the wrong model", "stopped working after two days",
+          "was missing parts", "was delivered three weeks late", "was billed twice"]
+INTENTS = ["Invoice", "RFQ", "Complaint", "General Enquiry"]
+
+
+def _person(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    company = rng.choice(COMPANIES)
+    domain = company.lower().replace(" ", "").replace(".", "") + ".com"
+    return f"{first} {last}", f"{first.lower()}.{last.lower()}@{domain}".replace("ü", "u"), company
+
+
+def _date(rng):
+    return (datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 600))).strftime("%Y-%m-%d")
+
+
+def _line_items(rng, n=None):
+    return [
+        {
+            "description": rng.choice(PRODUCTS),
+            "quantity": rng.randint(1, 500),
+            "unit_price": round(rng.uniform(0.5, 2500), 2)
+        }
+        for _ in range(n or rng.randint(1, 8))
+    ]
+
+
+def make_json(rng, intent: str, invalid: bool) -> dict:
+    """Build a document matching models/json_schema.py, or a deliberately broken one"""
+    if intent == "Invoice":
+        items = _line_items(rng)
+        doc = {
+            "invoice_id": f"INV-{rng.randint(10000, 99999)}",
+            "date": _date(rng),
+            "total_amount": round(sum(i["quantity"] * i["unit_price"] for i in items), 2),
+            "line_items": items,
+            "tax": round(rng.uniform(0, 0.25), 2),
+            "shipping_address": f"{rng.randint(1, 999)} Industrial Way, {rng.choice(['Berlin', 'Austin', 'Pune', 'Leeds'])}"
+        }
+        required = ["invoice_id", "date", "total_amount", "line_items"]
+    elif intent == "RFQ":
+        doc = {
+            "rfq_id": f"RFQ-{rng.randint(1000, 9999)}",
+            "requester": _person(rng)[0],
+            "items": _line_items(rng),
+            "deadline": _date(rng)
+        }
+        required = ["rfq_id", "requester", "items"]
+    else:
+        name, _, company = _person(rng)
+        doc = {
+            "complaint_id": f"CMP-{rng.randint(100, 999)}",
+            "customer": f"{name} ({company})",
+            "issue": f"The {rng.choice(PRODUCTS)} {rng.choice(ISSUES)}.",
+            "severity": rng.choice(["Low", "Medium", "High"])
+        }
+        required = ["complaint_id", "customer", "issue"]
+
+    if invalid:
+        mode = rng.choice(["missing", "type"])
+        if mode == "missing":
+            doc.pop(rng.choice(required))
+        else:
+            key = rng.choice(required)
+            doc[key] = {"unexpected": True} if not isinstance(doc[key], dict) else "oops"
+    return doc
+
+
+def make_email(rng, intent: str, body_paragraphs: int) -> str:
+    sender_name, sender_email, company = _person(rng)
+    to_name, to_email, _ = _person(rng)
+    product = rng.choice(PRODUCTS)
+    subjects = {
+        "Invoice": f"Invoice INV-{rng.randint(10000, 99999)} for {product}",
+        "RFQ": f"Request for quotation: {rng.randint(10, 900)} x {product}",
+        "Complaint": f"Complaint about order {rng.randint(100000, 999999)}",
+        "General Enquiry": f"Question about {product}"
+    }
+    openers = {
+        "Invoice": f"Please find attached our invoice for the {product} delivered on {_date(rng)}. Payment is due within 30 days.",
+        "RFQ": f"We would like a quotation for {rng.randint(10, 900)} units of {product}, delivered by {_date(rng)}.",
+        "Complaint": f"I am writing to complain because the {product} we received {rng.choice(ISSUES)}. This is unacceptable.",
+        "General Enquiry": f"Could you tell us whether the {product} is available in other sizes?"
+    }
+    filler = ("Our procurement team reviewed the previous order history and would appreciate a prompt reply. "
+              "Let us know if any further details are required from our side. ")
+    body = "\n\n".join([openers[intent]] + [filler * rng.randint(1, 4) for _ in range(body_paragraphs)])
+    headers = (
+        f"From: {sender_name} <{sender_email}>\n"
+        f"To: {to_name} <{to_email}>\n"
+        f"Subject: {subjects[intent]}\n"
+        f"Date: {_date(rng)}\n"
+        f"Message-ID: <{rng.getrandbits(64):x}@{sender_email.split('@')[1]}>\n"
+    )
+    return f"{headers}\nDear {to_name.split()[0]},\n\n{body}\n\nRegards,\n{sender_name}\n{company}\n"
+
+
+def make_pdf(rng, intent: str, pages: int) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    title = {"Invoice": "INVOICE", "RFQ": "REQUEST FOR QUOTATION",
+             "Complaint": "CUSTOMER COMPLAINT", "General Enquiry": "GENERAL ENQUIRY"}[intent]
+    sender_name, sender_email, company = _person(rng)
+    for page_no in range(pages):
+        page = doc.new_page()
+        y = 60
+        page.insert_text((50, y), f"{company} - {title} - page {page_no + 1} of {pages}", fontsize=13)
+        y += 30
+        page.insert_text((50, y), f"Contact: {sender_name} <{sender_email}>   Date: {_date(rng)}")
+        y += 25
+        for item in _line_items(rng, 30):
+            page.insert_text((50, y), f"{item['description']:<24} qty {item['quantity']:>4}  @ {item['unit_price']:>9.2f}")
+            y += 22
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip().lower()] = float(weight)
+    unknown = set(weights) - {"email", "json", "pdf"}
+    if unknown:
+        raise ValueError(f"Unknown document kinds in mix: {sorted(unknown)}")
+    return weights
+
+
+def generate_corpus(out_dir: str, count: int = 100, mix: str = "email=0.5,json=0.3,pdf=0.2",
+                    invalid_rate: float = 0.1, pdf_pages=(1, 5), email_paragraphs=(1, 6), seed: int = 42) -> str:
+    """
+    Write count documents to out_dir plus a manifest.jsonl with the
+    expected format/intent of each. Returns the manifest path.
+    """
+    rng = random.Random(seed)
+    weights = _parse_mix(mix)
+    kinds, kind_weights = list(weights), list(weights.values())
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.jsonl")
+
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        for i in range(count):
+            kind = rng.choices(kinds, kind_weights)[0]
+            record = {"kind": kind}
+            if kind == "email":
+                intent = rng.choice(INTENTS)
+                name = f"email_{i:06d}.eml"
+                with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+                    f.write(make_email(rng, intent, rng.randint(*email_paragraphs)))
+                record.update({"format": "EMAIL", "intent": intent})
+            elif kind == "json":
+                intent = rng.choice(["Invoice", "RFQ", "Complaint"])
+                invalid = rng.random() < invalid_rate
+                name = f"{intent.lower()}_{i:06d}.json"
+                with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+                    json.dump(make_json(rng, intent, invalid), f, indent=2)
+                record.update({"format": "JSON", "intent": intent, "valid": not invalid})
+            else:
+                intent = rng.choice(INTENTS)
+                name = f"document_{i:06d}.pdf"
+                with open(os.path.join(out_dir, name), "wb") as f:
+                    f.write(make_pdf(rng, intent, rng.randint(*pdf_pages)))
+                record.update({"format": "PDF", "intent": intent})
+            record["file"] = name
+            manifest.write(json.dumps(record) + "\n")
+
+    logger.info(f"Generated {count} documents in {out_dir}")
+    return manifest_path
+
+
+def _range(value: str):
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic ingestion corpus")
+    parser.add_argument("--out", default="corpus")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--mix", default="email=0.5,json=0.3,pdf=0.2")
+    parser.add_argument("--invalid-rate", type=float, default=0.1)
+    parser.add_argument("--pdf-pages", type=_range, default=(1, 5), help="e.g. 1-20")
+    parser.add_argument("--email-paragraphs", type=_range, default=(1, 6), help="e.g. 1-10")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    path = generate_corpus(args.out, args.count, args.mix, args.invalid_rate,
+                           args.pdf_pages, args.email_paragraphs, args.seed)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
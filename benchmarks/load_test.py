@@ -0,0 +1,183 @@
+"""
+End-to-end load test: pushes a synthetic corpus through AgentRouter at a
+target rate with the stub LLM and reports throughput, latency
+percentiles, peak RSS during the run and storage growth. Latency is
+measured from each document's scheduled release, or from when a worker
+picks it up when the rate is unthrottled. JSON documents the corpus
+marks valid or invalid are also scored on whether schema validation
+agreed.
+
+    python -m benchmarks.load_test --count 500 --rate 20 --concurrency 8 --llm-latency 0.2
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_router import AgentRouter
+from benchmarks.corpus import generate_corpus
+from benchmarks.stub_llm import install_stub
+from memory_tracker import PeakMemoryTracker
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def load_manifest(corpus_dir: str):
+    with open(os.path.join(corpus_dir, "manifest.jsonl"), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def route_document(router: AgentRouter, corpus_dir: str, record: dict) -> dict:
+    return router.route_file(os.path.join(corpus_dir, record["file"]), source_name=record["file"])
+
+
+def run_load(router: AgentRouter, corpus_dir: str, records, rate: float, concurrency: int,
+             storage_dir: str) -> dict:
+    """Open-loop driver: documents are released on a fixed schedule whether or not earlier ones finished"""
+    latencies, errors = [], 0
+    correct = {"format": 0, "intent": 0}
+    near_duplicates = 0
+    # JSONAgent reports schema problems as valid=False with "errors", not "error"
+    validation = {"checked": 0, "correct": 0, "schema_failures": 0, "missed_invalid": 0, "rejected_valid": 0}
+    lock = threading.Lock()
+    storage_before = _dir_size(storage_dir)
+
+    def task(record, scheduled):
+        nonlocal errors, near_duplicates
+        if scheduled is None:
+            # Unthrottled: everything is released at once, so time the document itself
+            scheduled = time.perf_counter()
+        try:
+            out = route_document(router, corpus_dir, record)
+            failed = "error" in out.get("result", {})
+        except Exception:
+            out, failed = {}, True
+        latency = time.perf_counter() - scheduled
+        result = out.get("result") or {}
+        with lock:
+            latencies.append(latency)
+            errors += failed
+            validation["schema_failures"] += result.get("valid") is False
+            if "valid" in record:
+                detected = result.get("valid") is True
+                validation["checked"] += 1
+                validation["correct"] += detected == record["valid"]
+                validation["missed_invalid"] += detected and not record["valid"]
+                validation["rejected_valid"] += record["valid"] and not detected
+            near_duplicates += "near_duplicate" in out
+            correct["format"] += out.get("format") == record["format"]
+            correct["intent"] += out.get("intent") == record["intent"]
+
+    start = time.perf_counter()
+    with PeakMemoryTracker(interval=0.05) as rss, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, record in enumerate(records):
+            if not rate:
+                pool.submit(task, record, None)
+                continue
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, record, scheduled)
+    elapsed = time.perf_counter() - start
+
+    count = len(records)
+    return {
+        "documents": count,
+        "target_rate": rate or None,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_docs_per_sec": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 90, 95, 99)
+        } | {"max": round(max(latencies, default=0) * 1000, 1)},
+        "errors": errors,
+        "format_accuracy": round(correct["format"] / count, 3) if count else 0.0,
+        "intent_accuracy": round(correct["intent"] / count, 3) if count else 0.0,
+        "schema_failures": validation["schema_failures"],
+        "validation": {
+            "checked": validation["checked"],
+            "accuracy": round(validation["correct"] / validation["checked"], 3) if validation["checked"] else None,
+            "missed_invalid": validation["missed_invalid"],
+            "rejected_valid": validation["rejected_valid"]
+        },
+        "near_duplicates": near_duplicates,
+        "peak_rss_mb": round(rss.peak / 1048576, 1),
+        "rss_growth_mb": round((rss.peak - rss.baseline) / 1048576, 1),
+        "storage_growth_bytes": _dir_size(storage_dir) - storage_before
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test AgentRouter with a synthetic corpus")
+    parser.add_argument("--corpus", help="existing corpus directory (generated if omitted)")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--mix", default="email=0.5,json=0.3,pdf=0.2")
+    parser.add_argument("--rate", type=float, default=0, help="documents per second, 0 = unthrottled")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--db-url", help="memory store URL (defaults to a temporary SQLite file)")
+    parser.add_argument("--speculative", action="store_true")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8)
+    parser.add_argument("--latency-budget", type=float, help="per-document deadline in seconds")
+    args = parser.parse_args()
+
+    # Invalid corpus documents are expected, so keep per-document warnings quiet
+    logging.basicConfig(level=logging.ERROR)
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    try:
+        corpus_dir = args.corpus
+        if not corpus_dir:
+            corpus_dir = os.path.join(workdir, "corpus")
+            generate_corpus(corpus_dir, count=args.count, mix=args.mix)
+        records = load_manifest(corpus_dir)
+
+        storage_dir = os.path.join(workdir, "storage")
+        os.makedirs(storage_dir)
+        router = AgentRouter(
+            groq_api_key=os.getenv("GROQ_API_KEY", "stub"),
+            db_url=args.db_url or f"sqlite:///{os.path.join(storage_dir, 'memory_logs.db')}",
+            blob_dir=os.path.join(storage_dir, "blobs"),
+            speculative=args.speculative,
+            dedup_threshold=args.dedup_threshold,
+            latency_budget=args.latency_budget
+        )
+        install_stub(router, latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+
+        report = run_load(router, corpus_dir, records, args.rate, args.concurrency, storage_dir)
+        if args.speculative:
+            report["speculation"] = router.get_speculation_stats()
+        if args.latency_budget:
+            report["deadlines"] = router.get_deadline_stats()
+        router.memory.close()
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
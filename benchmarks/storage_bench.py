@@ -0,0 +1,92 @@
+"""
+Write and point-read throughput of the memory storage backends.
+SQLite (WAL, synchronous=FULL) fsyncs every commit, so the segment log
+is measured both with sync=True (fsync per entry, the same durability)
+and with sync=False (page cache only, lost on power failure).
+
+    python -m benchmarks.storage_bench --entries 20000 --reads 20000
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from memory.backend import create_memory
+from memory.segment_log import SegmentLogBackend
+
+
+def _payload(i: int, body_bytes: int) -> dict:
+    return {
+        "classification": {"format": "EMAIL", "intent": "RFQ"},
+        "result": {
+            "sender_name": f"Sender {i}",
+            "sender_email": f"sender{i}@example.com",
+            "urgency": "Medium",
+            "summary": "x" * body_bytes,
+            "action": "Send quotation"
+        }
+    }
+
+
+def bench_backend(backend: str, durability: str, open_memory, entries: int, reads: int,
+                  body_bytes: int) -> dict:
+    memory = open_memory()
+    try:
+        ids = []
+        start = time.perf_counter()
+        for i in range(entries):
+            ids.append(memory.log_entry(f"bench_{i}.eml", "EMAIL", "RFQ", _payload(i, body_bytes)))
+        write_secs = time.perf_counter() - start
+
+        sample = [random.choice(ids) for _ in range(reads)]
+        start = time.perf_counter()
+        for entry_id in sample:
+            if memory.fetch_by_id(entry_id) is None:
+                raise RuntimeError(f"Missing entry {entry_id}")
+        read_secs = time.perf_counter() - start
+    finally:
+        memory.close()
+
+    return {
+        "backend": backend,
+        "durability": durability,
+        "entries": entries,
+        "writes_per_sec": round(entries / write_secs, 1),
+        "point_reads_per_sec": round(reads / read_secs, 1),
+        "read_latency_us": round(read_secs / reads * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory storage backends")
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--body-bytes", type=int, default=512)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="storage_bench_")
+    try:
+        backends = [
+            ("sqlite", "fsync per commit",
+             lambda: create_memory(f"sqlite:///{os.path.join(workdir, 'bench.db')}")),
+            ("segment", "fsync per entry (sync=True)",
+             lambda: SegmentLogBackend(os.path.join(workdir, "segments-sync"), sync=True)),
+            ("segment", "page cache only (sync=False)",
+             lambda: SegmentLogBackend(os.path.join(workdir, "segments"), sync=False))
+        ]
+        results = [
+            bench_backend(name, durability, open_memory, args.entries, args.reads, args.body_bytes)
+            for name, durability, open_memory in backends
+        ]
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Local stand-in for ChatGroq so load tests run offline.
+Answers the repo's three prompts (format, intent, email extraction)
+with keyword heuristics after a configurable delay.
+"""
+import json
+import random
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_INTENT_KEYWORDS = [
+    ("Complaint", ("complain", "complaint", "damaged", "unacceptable", "issue")),
+    ("RFQ", ("quotation", "rfq", "quote")),
+    ("Invoice", ("invoice", "payment is due", "total_amount")),
+    ("Regulation", ("regulation", "compliance")),
+]
+
+
+def _content(prompt: str) -> str:
+    """The document part of a prompt, after its 'Content:'/'Email:' marker"""
+    for marker in ("Content:", "Email:", "Section:"):
+        if marker in prompt:
+            return prompt.rsplit(marker, 1)[1]
+    return prompt
+
+
+class StubChatModel(BaseChatModel):
+    latency: float = 0.05          # seconds before the first token
+    tokens_per_second: float = 0.0  # 0 streams the whole answer at once
+    model_name: str = "stub"
+    error_rate: float = 0.0         # share of answers degraded like a weak model's would be
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _degraded(self, prompt: str) -> str:
+        if "file format classifier" in prompt:
+            return "This looks like some kind of business document."
+        if "intent classifier" in prompt:
+            return "The sender seems to want something."
+        return '{"sender_name": "", "urgency": "Unclear'
+
+    def _answer(self, prompt: str) -> str:
+        if self.error_rate and random.random() < self.error_rate:
+            return self._degraded(prompt)
+        content = _content(prompt)
+        lowered = content.lower()
+        if "file format classifier" in prompt:
+            stripped = content.strip()
+            if stripped.startswith(("{", "[")):
+                return "JSON"
+            if re.search(r"^(from|to|subject):", stripped, re.I | re.M):
+                return "EMAIL"
+            return "PDF"
+        if "intent classifier" in prompt:
+            for intent, words in _INTENT_KEYWORDS:
+                if any(w in lowered for w in words):
+                    return intent
+            return "General Enquiry"
+        if "Email Parsing assistant" in prompt:
+            sender = re.search(r"^\s*From:\s*(.*?)\s*<([^>]+)>", content, re.M)
+            subject = re.search(r"^\s*Subject:\s*(.*)$", content, re.M)
+            urgent = any(w in lowered for w in ("urgent", "unacceptable", "asap", "immediately"))
+            return "```json\n" + json.dumps({
+                "sender_name": sender.group(1) if sender else "",
+                "sender_email": sender.group(2) if sender else "",
+                "urgency": "High" if urgent else "Medium",
+                "summary": (subject.group(1) if subject else content.strip()[:120]),
+                "action": "Reply to sender"
+            }, indent=1) + "\n```"
+        if "PDF section analyst" in prompt:
+            lines = [line.strip() for line in content.splitlines() if line.strip()]
+            return "```json\n" + json.dumps({
+                "summary": lines[0] if lines else "",
+                "key_points": [line for line in lines if re.search(r"total|due|deliver|please", line, re.I)][:5],
+                "parties": sorted(set(re.findall(r"[\w.+-]+@[\w-]+\.[\w.]+", content))),
+                "dates": sorted(set(re.findall(r"\d{4}-\d{2}-\d{2}", content))),
+                "amounts": sorted(set(re.findall(r"(?:USD|EUR|\$)\s?[\d,]+(?:\.\d+)?", content)))
+            }, indent=1) + "\n```"
+        return "OK"
+
+    @staticmethod
+    def _wait(seconds: float, timeout: Optional[float]):
+        """Sleep like a slow response, failing like an HTTP read timeout if it exceeds timeout"""
+        if timeout is not None and seconds > timeout:
+            time.sleep(max(timeout, 0))
+            raise TimeoutError("Request timed out.")
+        time.sleep(seconds)
+
+    def _prompt_text(self, messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._answer(self._prompt_text(messages))
+        self._wait(self.latency + (len(text) / 4 / self.tokens_per_second if self.tokens_per_second else 0),
+                   kwargs.get("timeout"))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._answer(self._prompt_text(messages))
+        self._wait(self.latency, kwargs.get("timeout"))
+        if not self.tokens_per_second:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+            return
+        # Roughly 4 characters per token
+        for i in range(0, len(text), 4):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text[i:i + 4]))
+
+
+def install_stub(router, latency: float = 0.05, tokens_per_second: float = 0.0,
+                 fast_latency: float = None, fast_error_rate: float = 0.0):
+    """
+    Point every LLM-backed agent on an AgentRouter at a StubChatModel.
+    Agents running a model cascade get a second, faster stub for the
+    small tier (defaulting to a fifth of the large model's latency).
+    """
+    stub = StubChatModel(latency=latency, tokens_per_second=tokens_per_second)
+    fast = StubChatModel(
+        latency=latency / 5 if fast_latency is None else fast_latency,
+        tokens_per_second=tokens_per_second * 3,
+        error_rate=fast_error_rate,
+        model_name="stub-fast"
+    )
+    router.pdf_chunk_agent.llm = stub
+    for agent in (router.classifier, router.email_agent):
+        agent.llm = stub
+        if getattr(agent, "fast_llm", None) is not None:
+            agent.fast_llm = fast
+    return stub
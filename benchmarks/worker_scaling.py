@@ -0,0 +1,67 @@
+"""
+Throughput of WorkerPool as the number of worker processes grows.
+Uses a PDF-heavy synthetic corpus and the stub LLM so the work is
+CPU-bound (PDF parsing, MinHash, pydantic validation).
+
+    python -m benchmarks.worker_scaling --count 200 --workers 1,2,4
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.load_test import load_manifest
+from worker_pool import WorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure WorkerPool scaling")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--mix", default="pdf=0.6,json=0.3,email=0.1")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--stub-llm-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    workdir = tempfile.mkdtemp(prefix="worker_scaling_")
+    try:
+        corpus_dir = os.path.join(workdir, "corpus")
+        generate_corpus(corpus_dir, count=args.count, mix=args.mix, pdf_pages=(5, 15))
+        paths = [os.path.join(corpus_dir, r["file"]) for r in load_manifest(corpus_dir)]
+
+        rows = []
+        for n in (int(w) for w in args.workers.split(",")):
+            run_dir = os.path.join(workdir, f"run_{n}")
+            os.makedirs(run_dir)
+            pool = WorkerPool(
+                n,
+                db_url=f"sqlite:///{os.path.join(run_dir, 'memory_logs.db')}",
+                router_kwargs={"groq_api_key": "stub", "blob_dir": os.path.join(run_dir, "blobs")},
+                stub_llm_latency=args.stub_llm_latency
+            )
+            with pool:
+                # Time only the routing, not process start-up
+                pool.process_files(paths[:n])
+                start = time.perf_counter()
+                results = pool.process_files(paths)
+                elapsed = time.perf_counter() - start
+            rows.append({
+                "workers": n,
+                "docs_per_sec": round(len(results) / elapsed, 2),
+                "errors": sum(1 for r in results if r["error"]),
+                "logged": pool.writer_stats
+            })
+        base = rows[0]["docs_per_sec"]
+        for row in rows:
+            row["speedup"] = round(row["docs_per_sec"] / base, 2) if base else None
+        print(json.dumps({"cpu_count": os.cpu_count(), "runs": rows}, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Watch mode for a shared drop folder: new or changed files are routed
+through AgentRouter once they stop changing. Uses inotify on Linux and
+falls back to periodic directory scans elsewhere. A manifest of
+(path, size, mtime, sha256) lets restarts skip files already processed;
+files whose routing failed are recorded as failed and retried.
+
+    python -m drop_folder /srv/inbox --workers 4
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import select
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from archive_ingest import ArchiveIngestor, is_archive
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct("iIII")
+
+# Names written by browsers, editors and copy tools while a transfer is in progress
+_PARTIAL_SUFFIXES = (".tmp", ".part", ".partial", ".crdownload", ".download", ".swp", "~")
+# Archive checkpoints (see ArchiveIngestor.default_checkpoint_path)
+_CHECKPOINT_SUFFIX = ".checkpoint.json"
+# SQLite keeps these next to the database file
+_SQLITE_SIDE_FILES = ("", "-wal", "-shm", "-journal")
+
+
+def _ignored(name: str) -> bool:
+    return name.startswith(".") or name.lower().endswith(_PARTIAL_SUFFIXES)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class FileManifest:
+    """
+    Append-only JSONL record of processed files; the last line for a
+    path wins. Compacted on load once superseded lines dominate.
+    Each record has a status: "done", or "failed" for files to retry.
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        lines = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    continue
+                lines += 1
+                self.entries[record["path"]] = record
+        if lines > 2 * len(self.entries) + 100:
+            self._compact()
+
+    def _compact(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".manifest-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for record in self.entries.values():
+                    f.write(json.dumps(record) + "\n")
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.logger.info(f"Compacted manifest to {len(self.entries)} entries")
+
+    def get(self, path: str):
+        with self._lock:
+            return self.entries.get(path)
+
+    def is_current(self, path: str, size: int, mtime_ns: int) -> bool:
+        """True if path was processed successfully at exactly this size and mtime"""
+        record = self.get(path)
+        return (bool(record) and record.get("status", "done") == "done"
+                and record["size"] == size and record["mtime_ns"] == mtime_ns)
+
+    def record(self, path: str, size: int, mtime_ns: int, sha256: str, result: dict = None,
+               status: str = "done"):
+        record = {"path": path, "size": size, "mtime_ns": mtime_ns, "sha256": sha256,
+                  "processed_at": time.time(), "status": status, "result": result or {}}
+        with self._lock:
+            self.entries[path] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+
+class _Inotify:
+    """Minimal ctypes binding for a single non-recursive inotify watch"""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self):
+        """Drain pending events; returns (changed names, needs_rescan)"""
+        names, rescan = set(), False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                pos += _EVENT.size + length
+                if mask & (IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    rescan = True
+                elif name:
+                    names.add(os.fsdecode(name))
+        return names, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DropFolderWatcher:
+    """
+    Feeds files dropped into `directory` to an AgentRouter. A file is
+    picked up once its size and mtime have been stable for `settle`
+    seconds, hashed, and skipped if the manifest already has that
+    content for that path. mbox/zip archives go through ArchiveIngestor.
+    The watcher's own files (manifest, archive checkpoints, the router's
+    SQLite database or segment log) are never picked up, so the manifest
+    and checkpoints can live in the watched directory.
+    Files that failed to route are retried every retry_interval seconds,
+    and straight away after a restart. With inotify the loop blocks in
+    select() until something changes; the polling fallback rescans every
+    poll_interval seconds.
+    """
+
+    def __init__(self, router, directory: str, manifest_path: str = "drop_manifest.jsonl",
+                 workers: int = 4, settle: float = 2.0, poll_interval: float = 5.0,
+                 use_inotify: bool = True, on_result=None, retry_interval: float = 60.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.router = router
+        self.directory = os.path.abspath(directory)
+        self.manifest = FileManifest(manifest_path)
+        self.checkpoint_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self._own_paths, self._own_dirs = self._own_files(router, manifest_path)
+        self.workers = workers
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.on_result = on_result
+        self.retry_interval = retry_interval
+        self.stats = {"processed": 0, "skipped": 0, "errors": 0}
+        self._retry_at = None  # monotonic time of the next rescan for failed files
+        self._started = time.time()
+
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(self.directory)
+            except (OSError, AttributeError) as e:
+                # AttributeError: libc without inotify symbols (not Linux)
+                self.logger.warning(f"inotify unavailable, polling every {poll_interval}s: {e}")
+        self._pending = {}  # path -> (size, mtime_ns, last change time)
+        self._in_progress = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drop-folder")
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopped = threading.Event()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    @staticmethod
+    def _own_files(router, manifest_path: str):
+        """(paths, directories) written by the watcher and its router, which must not be routed"""
+        paths = {os.path.abspath(manifest_path)}
+        dirs = set()
+        memory = getattr(router, "memory", None)
+        engine = getattr(memory, "engine", None)
+        database = engine.url.database if engine is not None and engine.dialect.name == "sqlite" else None
+        if database and database != ":memory:":
+            db = os.path.abspath(database)
+            paths.update(db + suffix for suffix in _SQLITE_SIDE_FILES)
+        if getattr(memory, "directory", None):
+            dirs.add(os.path.abspath(memory.directory))
+        return paths, dirs
+
+    def _is_own(self, path: str) -> bool:
+        return (path in self._own_paths or path.endswith(_CHECKPOINT_SUFFIX)
+                or os.path.dirname(path) in self._own_dirs)
+
+    def _consider(self, path: str, now: float):
+        """Track a new or changed file until it settles"""
+        if _ignored(os.path.basename(path)) or self._is_own(path):
+            return
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._pending.pop(path, None)
+            return
+        if not os.path.isfile(path) or not self._due(path, st):
+            self._pending.pop(path, None)
+            return
+        previous = self._pending.get(path)
+        if previous is None or previous[:2] != (st.st_size, st.st_mtime_ns):
+            self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+
+    def _due(self, path: str, st) -> bool:
+        """New, changed, or failed long enough ago to retry"""
+        if self.manifest.is_current(path, st.st_size, st.st_mtime_ns):
+            return False
+        record = self.manifest.get(path)
+        if record and record.get("status") == "failed" and record["processed_at"] >= self._started and \
+                (record["size"], record["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            wait = record["processed_at"] + self.retry_interval - time.time()
+            if wait > 0:
+                self._schedule_retry(wait)
+                return False
+        return True
+
+    def _scan(self, now: float):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                self._consider(entry.path, now)
+
+    def _dispatch_settled(self, now: float):
+        for path, (size, mtime_ns, changed) in list(self._pending.items()):
+            with self._lock:
+                busy = path in self._in_progress
+            if busy or now - changed < self.settle:
+                # A file changed mid-processing is picked up again once the first run finishes
+                continue
+            # Re-stat: a writer that keeps the mtime but appends still changes the size
+            self._consider(path, now)
+            if self._pending.get(path, (None, None, None))[2] != changed:
+                continue
+            del self._pending[path]
+            with self._lock:
+                self._in_progress.add(path)
+            self._executor.submit(self._process, path, size, mtime_ns)
+
+    def _next_timeout(self, now: float):
+        timeouts = [] if self._inotify else [self.poll_interval]
+        if self._pending:
+            earliest = min(changed for _, _, changed in self._pending.values())
+            timeouts.append(max(earliest + self.settle - now, 0.05))
+        with self._lock:
+            if self._retry_at is not None:
+                timeouts.append(max(self._retry_at - now, 0.05))
+        return min(timeouts) if timeouts else None
+
+    def _schedule_retry(self, delay: float = None):
+        retry_at = time.monotonic() + (self.retry_interval if delay is None else delay)
+        with self._lock:
+            if self._retry_at is None or retry_at < self._retry_at:
+                self._retry_at = retry_at
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _process(self, path: str, size: int, mtime_ns: int):
+        try:
+            sha256 = file_sha256(path)
+            previous = self.manifest.get(path)
+            if previous and previous["sha256"] == sha256 and previous.get("status", "done") == "done":
+                # Touched or copied over with identical content
+                self.manifest.record(path, size, mtime_ns, sha256, previous.get("result"))
+                self._count("skipped")
+                return
+
+            source_name = os.path.basename(path)
+            if is_archive(path):
+                ingestor = ArchiveIngestor(self.router, workers=self.workers)
+                checkpoint = ingestor.default_checkpoint_path(path, self.checkpoint_dir)
+                summary = ingestor.ingest(path, checkpoint_path=checkpoint)
+                result = {"archive": True, "routed": summary["processed"], "errors": summary["errors"]}
+                # Every message failing means the LLM was unreachable, not bad input: start over
+                # next time. Individual bad messages stay covered by the checkpoint
+                failed = summary["processed"] > 0 and summary["errors"] >= summary["processed"]
+                if failed and os.path.exists(checkpoint):
+                    os.remove(checkpoint)
+            else:
+                out = self.router.route_file(path, source_name=source_name)
+                result = {
+                    "format": out["format"],
+                    "intent": out["intent"],
+                    "error": out.get("result", {}).get("error")
+                }
+                failed = bool(result["error"])
+            self.manifest.record(path, size, mtime_ns, sha256, result, status="failed" if failed else "done")
+            self._count("processed")
+            if result.get("error") or result.get("errors"):
+                self._count("errors")
+            if failed:
+                self._schedule_retry()
+                self.logger.warning(f"Routing {source_name} failed, retrying in {self.retry_interval}s: {result}")
+            else:
+                self.logger.info(f"Processed {source_name}: {result}")
+            if self.on_result:
+                self.on_result(path, result)
+        except FileNotFoundError:
+            self.logger.info(f"{path} was removed before it could be processed")
+        except Exception as e:
+            self.logger.error(f"Failed to process {path}: {e}")
+            self._count("errors")
+            # Not recorded, so a rescan picks it up again
+            self._schedule_retry()
+        finally:
+            with self._lock:
+                self._in_progress.discard(path)
+
+    def run(self, once: bool = False):
+        """
+        Process existing files, then keep watching until stop() is
+        called. With once, return after the current contents are done.
+        """
+        self.logger.info(f"Watching {self.directory} ({self.mode})")
+        self._scan(time.monotonic())
+        try:
+            while not self._stopped.is_set():
+                now = time.monotonic()
+                if once and not self._pending:
+                    break
+                timeout = self._next_timeout(now)
+                fds = [self._wake_r] + ([self._inotify.fd] if self._inotify else [])
+                ready, _, _ = select.select(fds, [], [], timeout)
+
+                now = time.monotonic()
+                if self._inotify and self._inotify.fd in ready:
+                    names, rescan = self._inotify.read()
+                    if rescan:
+                        self._scan(now)
+                    for name in names:
+                        self._consider(os.path.join(self.directory, name), now)
+                elif not self._inotify:
+                    self._scan(now)
+                with self._lock:
+                    retry_due = self._retry_at is not None and now >= self._retry_at
+                    if retry_due:
+                        self._retry_at = None
+                if retry_due:
+                    self._scan(now)
+                self._dispatch_settled(now)
+        finally:
+            self._executor.shutdown(wait=True)
+            self.close()
+        return dict(self.stats)
+
+    def stop(self):
+        """Ask run() to return; safe to call from another thread or a signal handler"""
+        self._stopped.set()
+        os.write(self._wake_w, b"x")
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest files dropped into a directory")
+    parser.add_argument("directory")
+    parser.add_argument("--manifest", default="drop_manifest.jsonl")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds a file must stay unchanged before it is processed")
+    parser.add_argument("--poll", action="store_true", help="scan periodically instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--once", action="store_true", help="process what is there now and exit")
+    parser.add_argument("--retry-interval", type=float, default=60.0,
+                        help="seconds before a file that failed to route is tried again")
+    parser.add_argument("--db-url", default=os.getenv("MEMORY_DB_URL", "sqlite:///memory_logs.db"))
+    parser.add_argument("--stub-llm-latency", type=float,
+                        help="use the offline stub LLM with this latency instead of Groq")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key and args.stub_llm_latency is None:
+        parser.error("GROQ_API_KEY is not set (use --stub-llm-latency for an offline run)")
+
+    logging.basicConfig(level=logging.INFO)
+    from agent_router import AgentRouter
+
+    router = AgentRouter(groq_api_key=api_key or "stub", db_url=args.db_url)
+    if args.stub_llm_latency is not None:
+        from benchmarks.stub_llm import install_stub
+        install_stub(router, latency=args.stub_llm_latency)
+    watcher = DropFolderWatcher(router, args.directory, manifest_path=args.manifest, workers=args.workers,
+                                settle=args.settle, poll_interval=args.poll_interval,
+                                use_inotify=not args.poll, retry_interval=args.retry_interval)
+    try:
+        stats = watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        stats = dict(watcher.stats)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import os
+import shutil
+import tempfile
 import streamlit as st
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from agent_router import AgentRouter
+from archive_ingest import ArchiveIngestor, is_archive
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -64,6 +67,14 @@ selected_model = st.sidebar.selectbox(
     model_options,
     index=0
 )
+chunk_pdfs = st.sidebar.checkbox(
+    "Chunked PDF analysis",
+    help="Summarise long PDFs chunk by chunk in parallel, with page references"
+)
+latency_budget = st.sidebar.number_input(
+    "Latency budget (seconds, 0 = none)", min_value=0.0, max_value=60.0, value=0.0, step=0.5,
+    help="Fields the LLM can't produce in time are filled by local heuristics and flagged"
+) or None
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Built by:** Shikher Jha")
@@ -87,7 +98,7 @@ with col1:
     st.subheader("File Upload")
     uploaded = st.file_uploader(
         "Upload a file", 
-        type=["pdf", "json", "txt", "eml"]
+        type=["pdf", "json", "txt", "eml", "mbox", "zip"]
     )
     
     if uploaded:
@@ -120,25 +131,66 @@ st.header("Processing")
 if st.button("Process Input", type="primary"):
     if not uploaded and not (paste_text and raw_text_input.strip()):
         st.warning("Please upload a file or enter text content.")
+    elif uploaded and is_archive(uploaded.name):
+        # Archives are spooled to disk and routed message by message
+        progress = st.empty()
+        routed_items = []
+
+        def show_archive_progress(source, out):
+            routed_items.append({"source": source, "format": out["format"], "intent": out["intent"],
+                                 "error": out.get("result", {}).get("error")})
+            progress.info(f"Routed {len(routed_items)} items, latest: {source}")
+
+        with st.spinner(f"Ingesting {uploaded.name}..."):
+            try:
+                suffix = os.path.splitext(uploaded.name)[1]
+                with tempfile.NamedTemporaryFile(prefix="archive-", suffix=suffix, delete=False) as spool:
+                    shutil.copyfileobj(uploaded, spool, 1024 * 1024)
+                try:
+                    summary = ArchiveIngestor(router).ingest(
+                        spool.name, on_result=show_archive_progress, archive_name=uploaded.name
+                    )
+                finally:
+                    os.remove(spool.name)
+                progress.empty()
+                st.header("Results")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Routed", summary["routed"])
+                with col2:
+                    st.metric("Errors", summary["errors"])
+                with col3:
+                    st.metric("Skipped", summary["skipped"])
+                st.dataframe(routed_items, use_container_width=True)
+            except Exception as e:
+                st.error(f"Archive ingestion failed: {str(e)}")
+                logger.error(f"Archive ingestion error: {e}")
     else:
+        live_fields = {}
+        live_view = st.empty()
+
+        def show_email_field(field, value):
+            """Render email fields while the rest of the extraction is still streaming"""
+            live_fields[field] = value
+            labels = [
+                ("sender_name", "Sender"), ("sender_email", "Email"), ("urgency", "Urgency"),
+                ("summary", "Summary"), ("action", "Action Required")
+            ]
+            lines = [f"**{label}:** {live_fields[key]}" for key, label in labels if key in live_fields]
+            live_view.info("Email analysis in progress...\n\n" + "\n\n".join(lines))
+
         with st.spinner("Processing your input..."):
             try:
                 if uploaded:
                     source_name = uploaded.name
-                    data = uploaded.read()
-                    
-                    if uploaded.name.lower().endswith(".pdf"):
-                        result = router.route(source_name, raw_bytes=data)
-                    else:
-                        try:
-                            text_content = data.decode("utf-8")
-                        except UnicodeDecodeError:
-                            st.error("Unable to decode file. Please ensure it's a valid text file.")
-                            st.stop()
-                        result = router.route(source_name, raw_text=text_content)
+                    # Large uploads are spooled to disk instead of copied into memory
+                    result = router.route_stream(uploaded, source_name, on_field=show_email_field,
+                                                 chunk_pdf=chunk_pdfs, latency_budget=latency_budget)
                 else:
                     source_name = f"manual_input_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    result = router.route(source_name, raw_text=raw_text_input)
+                    result = router.route(source_name, raw_text=raw_text_input, on_field=show_email_field,
+                                          latency_budget=latency_budget)
+                live_view.empty()
 
                 st.header("Results")
                 
@@ -153,6 +205,12 @@ if st.button("Process Input", type="primary"):
                         unsafe_allow_html=True
                     )
 
+                if result.get('degraded'):
+                    st.warning(
+                        f"Latency budget hit after {result['deadline']['elapsed_ms']} ms; heuristic values for: "
+                        + ", ".join(result['degraded'])
+                    )
+
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("Source", result['source'])
@@ -198,6 +256,29 @@ if st.button("Process Input", type="primary"):
                         text_preview = agent_result['raw_text'][:500]
                         st.text_area("Text Preview (first 500 chars)", value=text_preview, height=150)
                         st.write(f"**Total Characters:** {len(agent_result['raw_text'])}")
+                    elif 'raw_text_ref' in agent_result:
+                        # Large text lives in the blob store; only the preview is loaded
+                        text_ref = agent_result['raw_text_ref']
+                        text_preview = router.load_blob(text_ref, limit=500)
+                        st.text_area("Text Preview (first 500 chars)", value=text_preview, height=150)
+                        st.write(f"**Total Size:** {text_ref['size']} bytes (blob {text_ref['sha256'][:12]})")
+                    analysis = agent_result.get('analysis')
+                    if analysis and 'error' not in analysis:
+                        st.markdown(
+                            f"**Chunked Analysis:** {len(analysis['chunks'])} chunks over {analysis['pages']} pages "
+                            f"in {analysis['seconds']}s"
+                        )
+                        for section in analysis['sections']:
+                            first, last = section['pages']
+                            st.write(f"- p.{first}-{last}: {section['summary']}")
+                        for field, label in [('key_points', 'Key Points'), ('amounts', 'Amounts'), ('dates', 'Dates')]:
+                            if analysis.get(field):
+                                st.write(f"**{label}:** " + "; ".join(
+                                    f"{item['value']} (p.{', '.join(map(str, item['pages'][:5]))})"
+                                    for item in analysis[field][:10]
+                                ))
+                        if analysis['failed_chunks']:
+                            st.warning(f"{len(analysis['failed_chunks'])} chunks could not be analysed")
 
                 with st.expander("Raw JSON Output"):
                     st.json(result)
@@ -252,6 +333,46 @@ with col2:
     except Exception as e:
         st.error(f"Unable to load processing history: {str(e)}")
 
+st.subheader("Search Documents")
+
+search_cols = st.columns([3, 1, 1, 1])
+with search_cols[0]:
+    search_query = st.text_input("Search", placeholder="e.g. invoice acme")
+with search_cols[1]:
+    search_format = st.selectbox("Format", ["Any", "EMAIL", "JSON", "PDF"])
+with search_cols[2]:
+    search_intent = st.selectbox(
+        "Intent",
+        ["Any", "Invoice", "RFQ", "Complaint", "Regulation", "General Enquiry"]
+    )
+with search_cols[3]:
+    search_window = st.selectbox("Time Range", ["Any time", "Last 24 hours", "Last 7 days", "Last 30 days"])
+
+if search_query.strip():
+    window_days = {"Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30}.get(search_window)
+    try:
+        hits = router.memory.search(
+            search_query,
+            format_type=None if search_format == "Any" else search_format,
+            intent=None if search_intent == "Any" else search_intent,
+            since=datetime.utcnow() - timedelta(days=window_days) if window_days else None,
+            limit=20
+        )
+        if hits:
+            st.write(f"**{len(hits)} matching entries**")
+            for entry, score in hits:
+                with st.expander(f"{entry.source} ({entry.timestamp.strftime('%Y-%m-%d %H:%M:%S')}) | score {score:.2f}"):
+                    st.write(f"**Format:** {entry.format}")
+                    st.write(f"**Intent:** {entry.intent}")
+                    try:
+                        st.json(json.loads(entry.payload))
+                    except:
+                        st.text(entry.payload)
+        else:
+            st.info("No matching documents")
+    except Exception as e:
+        st.error(f"Search failed: {str(e)}")
+
 st.markdown("---")
 st.markdown("""
 <div style="text-align: center; color: #666;">
@@ -0,0 +1,68 @@
+import logging
+
+
+class StorageBackend:
+    """
+    Interface every memory store implements.
+    Entries come back as LogEntry objects (id, source, format, intent,
+    payload as a JSON string, timestamp, minhash) whatever the backend.
+    """
+
+    fts_enabled = False
+
+    def log_entry(self, source: str, format_type: str, intent: str, payload: dict, minhash: bytes = None,
+                  search_text: str = None, entry_id: str = None):
+        """
+        Store one entry and return its id.
+        search_text is document text to index when the payload only
+        holds a blob reference to it; entry_id lets a caller that
+        already assigned an id (e.g. a remote worker) keep it
+        """
+        raise NotImplementedError
+
+    def log_entries(self, records: list) -> list:
+        """Store a batch of log_entry keyword dicts and return their ids"""
+        return [self.log_entry(**record) for record in records]
+
+    def fetch_all(self, limit=10):
+        raise NotImplementedError
+
+    def fetch_by_id(self, entry_id: str):
+        raise NotImplementedError
+
+    def fetch_by_source(self, source: str, limit=10):
+        raise NotImplementedError
+
+    def fetch_by_intent(self, intent: str, limit=10):
+        raise NotImplementedError
+
+    def iter_signatures(self, batch_size: int = 10000):
+        raise NotImplementedError
+
+    def search(self, query: str, format_type: str = None, intent: str = None,
+               since=None, until=None, limit=10):
+        logging.getLogger(self.__class__.__name__).warning(
+            "Full-text search is not supported by this storage backend"
+        )
+        return []
+
+    def get_stats(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def create_memory(db_url: str = "sqlite:///memory_logs.db") -> StorageBackend:
+    """
+    Open the memory store named by db_url.
+    segment:///relative/dir (or segment:////absolute/dir, mirroring
+    sqlite:/// URLs) selects the append-only segment log, anything
+    else is handed to SQLAlchemy.
+    """
+    if db_url.startswith("segment:///"):
+        from memory.segment_log import SegmentLogBackend
+        return SegmentLogBackend(db_url[len("segment:///"):])
+
+    from memory.memory import MemoryLogger
+    return MemoryLogger(db_url=db_url)
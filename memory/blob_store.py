@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zlib
+
+
+class BlobStore:
+    """
+    Content-addressed store for large bodies (PDF text, raw inputs).
+    Each blob is written once under its SHA-256, zlib-compressed, and
+    referenced from log entries and route results as {"sha256", "size"}.
+    """
+
+    def __init__(self, root: str = "blobs", threshold_bytes: int = 16 * 1024):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.root = root
+        self.threshold_bytes = threshold_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    @staticmethod
+    def is_ref(value) -> bool:
+        return isinstance(value, dict) and "sha256" in value and "size" in value
+
+    @classmethod
+    def refs_in(cls, value) -> set:
+        """Digests of every blob reference nested anywhere in a payload"""
+        if cls.is_ref(value):
+            return {value["sha256"]}
+        found = set()
+        children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+        for child in children:
+            found |= cls.refs_in(child)
+        return found
+
+    def _touch(self, path: str):
+        # Re-used blobs count as fresh so a concurrent collect() won't delete them
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def should_store(self, data) -> bool:
+        """True if data is big enough to live outside the log row"""
+        if data is None:
+            return False
+        if isinstance(data, str):
+            # Cheap upper bound before encoding: UTF-8 is at most 4 bytes per char
+            if len(data) * 4 < self.threshold_bytes:
+                return False
+            return len(data.encode("utf-8")) >= self.threshold_bytes
+        return len(data) >= self.threshold_bytes
+
+    def put(self, data) -> dict:
+        """Store bytes or text and return its reference"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(zlib.compress(data, 6))
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.logger.info(f"Stored blob {digest[:12]} ({len(data)} bytes)")
+        else:
+            self._touch(path)
+
+        return {"sha256": digest, "size": len(data)}
+
+    def put_file(self, path: str, chunk_size: int = 1024 * 1024) -> dict:
+        """Store a file's contents without reading it into memory at once"""
+        sha = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha.update(chunk)
+                size += len(chunk)
+        digest = sha.hexdigest()
+        target = self._path(digest)
+
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+            try:
+                compressor = zlib.compressobj(6)
+                with os.fdopen(fd, "wb") as out, open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(chunk_size), b""):
+                        out.write(compressor.compress(chunk))
+                    out.write(compressor.flush())
+                os.replace(tmp_path, target)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.logger.info(f"Stored blob {digest[:12]} ({size} bytes)")
+        else:
+            self._touch(target)
+
+        return {"sha256": digest, "size": size}
+
+    def exists(self, ref) -> bool:
+        return os.path.exists(self._path(ref["sha256"] if isinstance(ref, dict) else ref))
+
+    def copy_to(self, ref, root: str):
+        """Copy a blob file as-is into another store rooted at root (e.g. an archive)"""
+        digest = ref["sha256"] if isinstance(ref, dict) else ref
+        target = os.path.join(root, os.path.relpath(self._path(digest), self.root))
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(self._path(digest), target + ".tmp")
+            os.replace(target + ".tmp", target)
+
+    def iter_digests(self):
+        """Every stored digest, for a full sweep"""
+        for _, _, files in os.walk(self.root):
+            for name in files:
+                if len(name) == 64 and not name.startswith("."):
+                    yield name
+
+    def collect(self, candidates, referenced: set, older_than: float = None) -> dict:
+        """
+        Delete candidate blobs that no live entry references. Blobs
+        written or re-used after older_than (a time.time() value) are
+        kept, since their log row may not be committed yet.
+        """
+        older_than = time.time() if older_than is None else older_than
+        removed, freed = 0, 0
+        for digest in candidates:
+            if digest in referenced:
+                continue
+            path = self._path(digest)
+            try:
+                st = os.stat(path)
+                if st.st_mtime >= older_than:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += st.st_size
+        if removed:
+            self.logger.info(f"Removed {removed} unreferenced blobs ({freed} bytes)")
+        return {"blobs_removed": removed, "blob_bytes_freed": freed}
+
+    def read(self, ref, limit: int = None) -> bytes:
+        """
+        Load a blob by reference or digest.
+        With limit, only that many bytes are decompressed.
+        """
+        digest = ref["sha256"] if isinstance(ref, dict) else ref
+        decompressor = zlib.decompressobj()
+        out = bytearray()
+        with open(self._path(digest), "rb") as f:
+            while limit is None or len(out) < limit:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    out += decompressor.flush()
+                    break
+                out += decompressor.decompress(chunk, 0 if limit is None else limit - len(out))
+                # Drain anything held back by max_length before reading more input
+                while decompressor.unconsumed_tail and (limit is None or len(out) < limit):
+                    out += decompressor.decompress(
+                        decompressor.unconsumed_tail, 0 if limit is None else limit - len(out)
+                    )
+        data = bytes(out if limit is None else out[:limit])
+        if limit is None and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Blob {digest} failed integrity check")
+        return data
+
+    def read_text(self, ref, limit: int = None) -> str:
+        return self.read(ref, limit).decode("utf-8", errors="ignore" if limit else "strict")
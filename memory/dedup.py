@@ -0,0 +1,263 @@
+import hashlib
+import heapq
+import logging
+import operator
+import re
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+
+# Mersenne prime used as the modulus of the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class MinHasher:
+    """
+    Computes fixed-size MinHash signatures over word shingles.
+    Signatures are packed as little-endian uint32 so they can be
+    stored directly in a BLOB column and compared byte-for-byte.
+    Long documents are hashed over a fixed-size sample of their
+    shingles (the max_shingles with the smallest hashes), which keeps
+    the cost bounded and is consistent across documents, so shared
+    shingles are sampled alike.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1,
+                 max_shingles: int = 1024):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_shingles = max_shingles
+
+        # Deterministic permutation coefficients so signatures stay
+        # comparable across processes and restarts
+        self._params = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+            a, b = struct.unpack("<QQ", digest)
+            self._params.append(((a % (_PRIME - 1)) + 1, b % _PRIME))
+
+    def _shingles(self, text: str) -> set:
+        tokens = _TOKEN_RE.findall(text.lower())
+        if len(tokens) < self.shingle_size:
+            return {" ".join(tokens)} if tokens else set()
+        k = self.shingle_size
+        return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+    def signature(self, text: str):
+        """
+        Return the packed MinHash signature for text, or None if it has
+        no word tokens (such texts have nothing to compare)
+        """
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+            for s in self._shingles(text or "")
+        ]
+        if not hashes:
+            return None
+        if self.max_shingles and len(hashes) > self.max_shingles:
+            hashes = heapq.nsmallest(self.max_shingles, hashes)
+
+        sig = array("I", [
+            min([(a * h + b) % _PRIME for h in hashes]) & _MAX_HASH
+            for a, b in self._params
+        ])
+        return sig.tobytes()
+
+    @staticmethod
+    def similarity(sig_a: bytes, sig_b: bytes) -> float:
+        """Estimate the Jaccard similarity of two packed signatures"""
+        a, b = array("I"), array("I")
+        a.frombytes(sig_a)
+        b.frombytes(sig_b)
+        if not a or len(a) != len(b):
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hashing index over MinHash signatures.
+    Lookups only touch one bucket per band, so cost is independent of
+    how many documents are stored.
+
+    Storage is compact enough for millions of documents (about 0.7KB
+    each): every band is a sorted array of 64-bit (band hash << 32 | slot)
+    entries searched by bisection, recent additions wait in small
+    per-band dicts until merged in, and candidates are scored on 16 bits
+    of each MinHash value (b-bit MinHash; accidental matches add about
+    2^-16 to a similarity).
+    """
+
+    # Merge pending additions into the sorted bands after this many (or 1/8 of the index)
+    MERGE_MIN = 4096
+
+    def __init__(self, num_perm: int = 128, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.bands = bands
+        self.num_perm = num_perm
+        self._band_width = (num_perm // bands) * 4  # bytes per band
+        self._sig_len = num_perm * 4
+        self._split = struct.Struct(f"{self._band_width}s" * bands).unpack
+        self._lock = threading.Lock()
+        self._journal = None  # adds/removes made while a background rebuild runs
+        self._state = self._empty_state()
+
+    def _empty_state(self) -> dict:
+        return {
+            "keys": [],          # slot -> key, None once removed
+            "slots": {},         # key -> slot
+            "sigs": array("H"),  # num_perm truncated values per slot
+            "sorted": [array("Q") for _ in range(self.bands)],
+            "pending": [dict() for _ in range(self.bands)],
+            "pending_count": 0
+        }
+
+    def __len__(self):
+        return len(self._state["slots"])
+
+    def _band_hashes(self, signature: bytes):
+        return map(zlib.crc32, self._split(signature))
+
+    @staticmethod
+    def _truncate(signature: bytes) -> array:
+        # One 16-bit half of every value; which half doesn't matter as long as it is always the same
+        truncated = array("H")
+        truncated.frombytes(memoryview(signature).cast("H")[::2].tobytes())
+        return truncated
+
+    def _indexable(self, signature: bytes) -> bool:
+        # All-max signatures were written for token-less texts before they got none
+        return bool(signature) and len(signature) == self._sig_len and signature != b"\xff" * self._sig_len
+
+    def _new_slot(self, state: dict, key: str, signature: bytes) -> int:
+        if key in state["slots"]:
+            self._remove(state, key)
+        slot = len(state["keys"])
+        state["keys"].append(key)
+        state["slots"][key] = slot
+        state["sigs"].extend(self._truncate(signature))
+        return slot
+
+    def _add(self, state: dict, key: str, signature: bytes):
+        slot = self._new_slot(state, key, signature)
+        for pending, band_hash in zip(state["pending"], self._band_hashes(signature)):
+            pending.setdefault(band_hash, []).append(slot)
+        state["pending_count"] += 1
+        if state["pending_count"] >= max(self.MERGE_MIN, len(state["slots"]) // 8):
+            self._merge(state)
+
+    def _merge(self, state: dict):
+        for i, pending in enumerate(state["pending"]):
+            if pending:
+                merged = state["sorted"][i].tolist()
+                merged.extend((band_hash << 32) | slot for band_hash, slots in pending.items() for slot in slots)
+                merged.sort()
+                state["sorted"][i] = array("Q", merged)
+        state["pending"] = [dict() for _ in range(self.bands)]
+        state["pending_count"] = 0
+
+    @staticmethod
+    def _remove(state: dict, key: str):
+        # The slot's band entries stay behind and are skipped by query until the next rebuild
+        slot = state["slots"].pop(key, None)
+        if slot is not None:
+            state["keys"][slot] = None
+
+    def add(self, key: str, signature: bytes):
+        """Insert a document signature under key"""
+        if not self._indexable(signature):
+            return
+        with self._lock:
+            self._add(self._state, key, signature)
+            if self._journal is not None:
+                self._journal.append((key, signature))
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(self._state, key)
+            if self._journal is not None:
+                self._journal.append((key, None))
+
+    def query(self, signature: bytes, threshold: float = 0.8):
+        """
+        Return (key, similarity) of the most similar stored document
+        at or above threshold, or None
+        """
+        if not self._indexable(signature):
+            return None
+
+        n = self.num_perm
+        truncated = self._truncate(signature)
+        best = None
+        with self._lock:
+            state = self._state
+            candidates = set()
+            for band, pending, band_hash in zip(state["sorted"], state["pending"], self._band_hashes(signature)):
+                lo = bisect_left(band, band_hash << 32)
+                hi = bisect_left(band, (band_hash + 1) << 32, lo)
+                candidates.update(entry & 0xFFFFFFFF for entry in band[lo:hi])
+                candidates.update(pending.get(band_hash, ()))
+
+            for slot in candidates:
+                key = state["keys"][slot]
+                if key is None:
+                    continue
+                score = sum(map(operator.eq, truncated, state["sigs"][slot * n:(slot + 1) * n])) / n
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (key, score)
+        return best
+
+    def _build(self, rows) -> dict:
+        state = self._empty_state()
+        hashes = array("I")  # band hashes per slot, row by row
+        for key, signature in rows:
+            if self._indexable(signature):
+                self._new_slot(state, key, signature)
+                hashes.extend(self._band_hashes(signature))
+        # Sorted one band at a time so the temporary list stays small
+        for i in range(self.bands):
+            entries = [(band_hash << 32) | slot for slot, band_hash in enumerate(hashes[i::self.bands])]
+            entries.sort()
+            state["sorted"][i] = array("Q", entries)
+        return state
+
+    def rebuild(self, rows, background: bool = False):
+        """
+        Rebuild the index from an iterable of (key, signature) pairs.
+        With background=True the rows are read on a daemon thread and the
+        returned thread can be joined; until it finishes the current index
+        keeps serving, and adds/removes made meanwhile carry over.
+        """
+        if not background:
+            self._swap(self._build(rows))
+            return None
+        with self._lock:
+            self._journal = []
+
+        def run():
+            try:
+                self._swap(self._build(rows))
+            except Exception as e:
+                self.logger.warning(f"Background LSH rebuild failed: {e}")
+                with self._lock:
+                    self._journal = None
+
+        thread = threading.Thread(target=run, name="lsh-rebuild", daemon=True)
+        thread.start()
+        return thread
+
+    def _swap(self, state: dict):
+        with self._lock:
+            for key, signature in self._journal or ():
+                if signature is None:
+                    self._remove(state, key)
+                else:
+                    self._add(state, key, signature)
+            self._state, self._journal = state, None
+        self.logger.info(f"LSH index rebuilt with {len(self)} signatures")
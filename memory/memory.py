@@ -1,13 +1,21 @@
-from sqlalchemy import create_engine, Column, String, Text, DateTime
+from sqlalchemy import create_engine, event, inspect, text, Column, String, Text, DateTime, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import json
 import logging
+import re
 import uuid
 
+from memory.backend import StorageBackend
+
 Base = declarative_base()
 
+FTS_TABLE = "log_entries_fts"
+# Contentless: the index keeps only its inverted lists, not a second copy of every
+# body, so text moved to the blob store is not written back into the database
+FTS_COLUMNS = "source, sender, summary, body, content='', tokenize='porter unicode61'"
+
 class LogEntry(Base):
     __tablename__ = "log_entries"
     
@@ -17,39 +25,184 @@ class LogEntry(Base):
     intent = Column(String)
     payload = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    minhash = Column(LargeBinary, nullable=True)
 
-class MemoryLogger:
+class MemoryLogger(StorageBackend):
     def __init__(self, db_url="sqlite:///memory_logs.db"):  # Fixed __init__
         self.logger = logging.getLogger(self.__class__.__name__)
        
         try:
             self.engine = create_engine(db_url, echo=False)
+            if self.engine.dialect.name == "sqlite":
+                event.listen(self.engine, "connect", self._configure_sqlite)
             Base.metadata.create_all(self.engine)
+            self._migrate()
             self.Session = sessionmaker(bind=self.engine)
             self.logger.info(f"Database initialized at: {db_url}")
         except Exception as e:
             self.logger.error(f"Failed to initialize database: {e}")
             raise
     
-    def log_entry(self, source: str, format_type: str, intent: str, payload: dict):
+    @staticmethod
+    def _configure_sqlite(dbapi_conn, connection_record):
+        """WAL lets maintenance and readers run alongside the ingestion writer"""
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")  # only takes effect on new files
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA busy_timeout = 5000")
+        cursor.close()
+
+    def _migrate(self):
+        """Add columns introduced after a database was first created"""
+        columns = {c["name"] for c in inspect(self.engine).get_columns(LogEntry.__tablename__)}
+        with self.engine.begin() as conn:
+            if "minhash" not in columns:
+                conn.execute(text(f"ALTER TABLE {LogEntry.__tablename__} ADD COLUMN minhash BLOB"))
+                self.logger.info("Added minhash column to log_entries")
+            for column in ("timestamp", "format", "intent"):
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_log_entries_{column} "
+                    f"ON {LogEntry.__tablename__} ({column})"
+                ))
+        self._init_fts()
+
+    def _init_fts(self):
+        """Create the FTS5 index and backfill it from existing rows"""
+        self.fts_enabled = False
+        if self.engine.dialect.name != "sqlite":
+            self.logger.info("Full-text search requires SQLite, search disabled")
+            return
+        try:
+            with self.engine.begin() as conn:
+                existing = conn.execute(text(
+                    "SELECT sql FROM sqlite_master WHERE type='table' AND name=:name"
+                ), {"name": FTS_TABLE}).scalar()
+                if existing and "content=''" not in existing:
+                    # Older databases stored a full copy of every indexed body; rebuild contentless
+                    conn.execute(text(f"ALTER TABLE {FTS_TABLE} RENAME TO {FTS_TABLE}_old"))
+                    conn.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({FTS_COLUMNS})"))
+                    conn.execute(text(
+                        f"INSERT INTO {FTS_TABLE} (rowid, source, sender, summary, body) "
+                        f"SELECT rowid, source, sender, summary, body FROM {FTS_TABLE}_old"
+                    ))
+                    conn.execute(text(f"DROP TABLE {FTS_TABLE}_old"))
+                    self.logger.info("Rebuilt full-text index as contentless")
+                elif not existing:
+                    conn.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({FTS_COLUMNS})"))
+                    rows = conn.execute(text(
+                        f"SELECT rowid, source, payload FROM {LogEntry.__tablename__}"
+                    ))
+                    count = 0
+                    for rowid, source, payload in rows:
+                        try:
+                            payload = json.loads(payload) if payload else {}
+                        except (TypeError, ValueError):
+                            payload = {}
+                        self._index_document(conn, rowid, source, payload)
+                        count += 1
+                    self.logger.info(f"Created full-text index with {count} entries")
+            self.fts_enabled = True
+        except Exception as e:
+            self.logger.warning(f"FTS5 unavailable, search disabled: {e}")
+
+    @staticmethod
+    def _search_fields(source: str, payload: dict) -> dict:
+        """Pull the searchable text out of a routed payload"""
+        result = payload.get("result") if isinstance(payload, dict) else None
+        if not isinstance(result, dict):
+            result = {}
+
+        sender = " ".join(str(result.get(k) or "") for k in ("sender_name", "sender_email"))
+        summary = " ".join(str(result.get(k) or "") for k in ("summary", "action"))
+
+        if result.get("raw_text"):
+            body = str(result["raw_text"])
+        elif result.get("data") is not None:
+            body = json.dumps(result["data"], default=str)
+        else:
+            body = ""
+
+        return {"source": source or "", "sender": sender.strip(), "summary": summary.strip(), "body": body}
+
+    def _index_document(self, conn, rowid: int, source: str, payload: dict, body: str = None):
+        fields = self._search_fields(source, payload)
+        if body:
+            fields["body"] = body
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, source, sender, summary, body) "
+            "VALUES (:rowid, :source, :sender, :summary, :body)"
+        ), {"rowid": rowid, **fields})
+
+    def unindex_document(self, conn, rowid: int, source: str, payload, body: str = None):
+        """
+        Remove a row from the contentless index. FTS5 needs the exact
+        values that were indexed: pass the externalized body (the text
+        given as search_text) when the payload only holds its blob ref.
+        """
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except ValueError:
+                payload = {}
+        fields = self._search_fields(source, payload or {})
+        if body:
+            fields["body"] = body
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, source, sender, summary, body) "
+            "VALUES ('delete', :rowid, :source, :sender, :summary, :body)"
+        ), {"rowid": rowid, **fields})
+
+    def _add_entry(self, session, source: str, format_type: str, intent: str, payload: dict,
+                   minhash: bytes = None, search_text: str = None, entry_id: str = None) -> str:
+        entry_id = entry_id or str(uuid.uuid4())
+        entry = LogEntry(
+            id=entry_id,  
+            source=source,
+            format=format_type,  
+            intent=intent,
+            payload=json.dumps(payload, default=str),
+            minhash=minhash
+        )    
+        session.add(entry)
+        if self.fts_enabled:
+            # Index in the same transaction so search never drifts from log_entries
+            session.flush()
+            rowid = session.execute(text(
+                f"SELECT rowid FROM {LogEntry.__tablename__} WHERE id = :id"
+            ), {"id": entry_id}).scalar()
+            self._index_document(session, rowid, source, payload, body=search_text)
+        return entry_id
+
+    def log_entry(self, source: str, format_type: str, intent: str, payload: dict, minhash: bytes = None,
+                  search_text: str = None, entry_id: str = None):
         session = self.Session()
         try:
-            entry = LogEntry(
-                id=str(uuid.uuid4()),  
-                source=source,
-                format=format_type,  
-                intent=intent,
-                payload=json.dumps(payload, default=str)
-            )    
-            session.add(entry)
+            entry_id = self._add_entry(session, source, format_type, intent, payload,
+                                       minhash=minhash, search_text=search_text, entry_id=entry_id)
             session.commit()
             self.logger.info(f"Logged entry for source: {source}")
+            return entry_id
         except Exception as e:
             session.rollback()
             self.logger.error(f"Failed to log entry: {e}")
             raise
         finally:
             session.close()
+
+    def log_entries(self, records: list) -> list:
+        """Write a batch of log_entry keyword dicts in one transaction"""
+        session = self.Session()
+        try:
+            ids = [self._add_entry(session, **record) for record in records]
+            session.commit()
+            self.logger.info(f"Logged {len(ids)} entries")
+            return ids
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Failed to log batch: {e}")
+            raise
+        finally:
+            session.close()
     
     def fetch_all(self, limit=10):
         session = self.Session()
@@ -62,6 +215,29 @@ class MemoryLogger:
         finally:
             session.close()
    
+    def fetch_by_id(self, entry_id: str):
+        """Fetch a single entry by its id"""
+        session = self.Session()
+        try:
+            return session.get(LogEntry, entry_id)
+        except Exception as e:
+            self.logger.error(f"Failed to fetch entry {entry_id}: {e}")
+            return None
+        finally:
+            session.close()
+
+    def iter_signatures(self, batch_size: int = 10000):
+        """Yield (id, minhash) for every entry that has a signature"""
+        session = self.Session()
+        try:
+            query = session.query(LogEntry.id, LogEntry.minhash).filter(
+                LogEntry.minhash.isnot(None)
+            ).yield_per(batch_size)
+            for entry_id, minhash in query:
+                yield entry_id, minhash
+        finally:
+            session.close()
+   
     def fetch_by_source(self, source: str, limit=10):
         """Fetch entries by source name"""
         session = self.Session()
@@ -90,6 +266,71 @@ class MemoryLogger:
         finally:
             session.close()
     
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn free text into an FTS5 query: every term must match, last term as prefix"""
+        terms = re.findall(r"\w+", query or "")
+        if not terms:
+            return ""
+        quoted = [f'"{t}"' for t in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, query: str, format_type: str = None, intent: str = None,
+               since: datetime = None, until: datetime = None, limit=10):
+        """
+        Ranked full-text search over source, sender, summary and document text.
+        Returns a list of (LogEntry, score) with the best match first
+        """
+        if not self.fts_enabled:
+            self.logger.warning("Full-text search is not available for this database")
+            return []
+
+        match = self._fts_query(query)
+        if not match:
+            return []
+
+        filters = []
+        params = {"match": match, "limit": limit}
+        if format_type:
+            filters.append("e.format = :format")
+            params["format"] = format_type
+        if intent:
+            filters.append("e.intent = :intent")
+            params["intent"] = intent
+        if since:
+            filters.append("e.timestamp >= :since")
+            params["since"] = since.isoformat(sep=" ")
+        if until:
+            filters.append("e.timestamp <= :until")
+            params["until"] = until.isoformat(sep=" ")
+        where = "".join(f" AND {f}" for f in filters)
+
+        # Weight sender/source hits above body hits
+        sql = text(
+            f"SELECT e.id, bm25({FTS_TABLE}, 4.0, 3.0, 2.0, 1.0) AS score "
+            f"FROM {FTS_TABLE} JOIN {LogEntry.__tablename__} e ON e.rowid = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match{where} "
+            "ORDER BY score LIMIT :limit"
+        )
+
+        session = self.Session()
+        try:
+            ranked = session.execute(sql, params).all()
+            if not ranked:
+                return []
+            entries = {
+                e.id: e for e in
+                session.query(LogEntry).filter(LogEntry.id.in_([r.id for r in ranked])).all()
+            }
+            # bm25 is lower-is-better; flip it so callers get higher-is-better
+            return [(entries[r.id], -r.score) for r in ranked if r.id in entries]
+        except Exception as e:
+            self.logger.error(f"Search failed: {e}")
+            return []
+        finally:
+            session.close()
+    
     def get_stats(self):
         """Get statistics about logged entries"""
         session = self.Session()
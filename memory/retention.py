@@ -0,0 +1,330 @@
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from memory.memory import MemoryLogger, LogEntry, FTS_TABLE
+from memory.blob_store import BlobStore
+
+ARCHIVE_PATTERN = "log_entries-*.jsonl.gz"
+_DIGEST_RE = re.compile(r'"sha256": "([0-9a-f]{64})"')
+
+
+class RetentionPolicy:
+    """
+    Limits for memory_logs.db.
+    max_age_days: entries older than this are archived and removed
+    max_size_mb: oldest entries are archived until live data fits
+    """
+
+    def __init__(self, max_age_days: float = None, max_size_mb: float = None):
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+
+    def cutoff(self, now: datetime = None):
+        if self.max_age_days is None:
+            return None
+        return (now or datetime.utcnow()) - timedelta(days=self.max_age_days)
+
+
+class RetentionManager:
+    """
+    Archives and deletes expired entries. With a blob store, the blobs
+    those entries referenced are copied into archive_dir/blobs and then
+    removed from the live store once no remaining entry references them.
+    """
+
+    def __init__(self, memory: MemoryLogger, policy: RetentionPolicy,
+                 archive_dir: str = "archive", batch_size: int = 500, vacuum_pages: int = 1000,
+                 blobs: BlobStore = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if memory.engine.dialect.name != "sqlite":
+            raise ValueError("RetentionManager only supports SQLite databases")
+        self.memory = memory
+        self.policy = policy
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.blobs = blobs
+        self._blob_candidates = set()
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+    def db_size(self) -> dict:
+        """Return file size and live (non-free) size of the database in bytes"""
+        with self.memory.engine.connect() as conn:
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            free_pages = conn.execute(text("PRAGMA freelist_count")).scalar()
+        return {
+            "file_bytes": page_size * page_count,
+            "live_bytes": page_size * (page_count - free_pages),
+            "page_size": page_size
+        }
+
+    def ensure_incremental_vacuum(self):
+        """
+        Switch the database to auto_vacuum=INCREMENTAL.
+        Existing databases need one full VACUUM for the change to apply.
+        """
+        with self.memory.engine.connect() as conn:
+            mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+            if mode == 2:
+                return
+            self.logger.info("Enabling incremental vacuum (one-time full VACUUM)")
+            conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+            conn.commit()
+
+    def _next_batch(self, conn, cutoff):
+        table = LogEntry.__tablename__
+        if cutoff is not None:
+            rows = conn.execute(text(
+                f"SELECT rowid, id, source, format, intent, payload, timestamp FROM {table} "
+                "WHERE timestamp < :cutoff ORDER BY timestamp LIMIT :limit"
+            ), {"cutoff": cutoff.isoformat(sep=" "), "limit": self.batch_size}).all()
+        else:
+            rows = conn.execute(text(
+                f"SELECT rowid, id, source, format, intent, payload, timestamp FROM {table} "
+                "ORDER BY timestamp LIMIT :limit"
+            ), {"limit": self.batch_size}).all()
+        return rows
+
+    @staticmethod
+    def _payload(row) -> dict:
+        try:
+            return json.loads(row.payload) if row.payload else {}
+        except ValueError:
+            return {}
+
+    def _archive_blobs(self, rows):
+        """Keep archived entries self-contained: copy their blobs next to the segments"""
+        for row in rows:
+            for digest in BlobStore.refs_in(self._payload(row)):
+                try:
+                    self.blobs.copy_to(digest, os.path.join(self.archive_dir, "blobs"))
+                    self._blob_candidates.add(digest)
+                except FileNotFoundError:
+                    self.logger.warning(f"Blob {digest[:12]} referenced by {row.id} is missing")
+
+    def _archive_batch(self, rows) -> str:
+        """Write one batch to a new compressed segment and fsync it before deletion"""
+        name = f"log_entries-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.jsonl.gz"
+        path = os.path.join(self.archive_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                for row in rows:
+                    record = {
+                        "id": row.id,
+                        "source": row.source,
+                        "format": row.format,
+                        "intent": row.intent,
+                        "payload": row.payload,
+                        "timestamp": str(row.timestamp)
+                    }
+                    gz.write((json.dumps(record) + "\n").encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+        if self.blobs is not None:
+            self._archive_blobs(rows)
+        return path
+
+    def _indexed_body(self, payload: dict):
+        """The externalized text that was indexed for an entry, read back from its blob"""
+        result = payload.get("result") if isinstance(payload, dict) else None
+        ref = result.get("raw_text_ref") if isinstance(result, dict) else None
+        if not ref or self.blobs is None:
+            return None
+        try:
+            return self.blobs.read_text(ref)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Cannot read indexed body {ref.get('sha256', '')[:12]}: {e}")
+            return None
+
+    def _delete_batch(self, rows):
+        rowids = [row.rowid for row in rows]
+        params = {f"r{i}": rowid for i, rowid in enumerate(rowids)}
+        placeholders = ", ".join(f":r{i}" for i in range(len(rowids)))
+        # One short transaction per batch so ingestion writers are never blocked for long
+        with self.memory.engine.begin() as conn:
+            if self.memory.fts_enabled:
+                # The index is contentless, so each row is removed with the values it was indexed with
+                for row in rows:
+                    payload = self._payload(row)
+                    self.memory.unindex_document(conn, row.rowid, row.source, payload,
+                                                 body=self._indexed_body(payload))
+                # Bounded merge so FTS delete markers don't keep the index from shrinking
+                conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('merge', 64)"))
+            conn.execute(text(f"DELETE FROM {LogEntry.__tablename__} WHERE rowid IN ({placeholders})"), params)
+
+    def _expire(self, cutoff, report, size_limit=None):
+        while True:
+            if size_limit is not None and self.db_size()["live_bytes"] <= size_limit:
+                return
+            with self.memory.engine.connect() as conn:
+                rows = self._next_batch(conn, cutoff)
+            if not rows:
+                return
+            report["segments"].append(self._archive_batch(rows))
+            self._delete_batch(rows)
+            report["archived"] += len(rows)
+            time.sleep(0)  # yield to other writers between batches
+
+    def incremental_vacuum(self) -> int:
+        """Release free pages back to the filesystem in small steps"""
+        released = 0
+        while True:
+            with self.memory.engine.connect() as conn:
+                free_pages = conn.execute(text("PRAGMA freelist_count")).scalar()
+                if not free_pages:
+                    break
+                step = min(free_pages, self.vacuum_pages)
+                conn.execute(text(f"PRAGMA incremental_vacuum({step})"))
+                conn.commit()
+                after = conn.execute(text("PRAGMA freelist_count")).scalar()
+            released += free_pages - after
+            if after >= free_pages:
+                # auto_vacuum is not INCREMENTAL, nothing more can be released
+                break
+        return released
+
+    def _live_blob_refs(self, candidates: set) -> set:
+        """Which of candidates are still referenced by a live entry (one scan of the table)"""
+        referenced = set()
+        with self.memory.engine.connect() as conn:
+            rows = conn.execute(text(
+                f"SELECT payload FROM {LogEntry.__tablename__} WHERE payload LIKE '%\"sha256\"%'"
+            ))
+            for (payload,) in rows:
+                referenced.update(d for d in _DIGEST_RE.findall(payload or "") if d in candidates)
+        return referenced
+
+    def collect_blobs(self, candidates=None, older_than: float = None) -> dict:
+        """
+        Remove blobs no live entry references. Defaults to the blobs of
+        entries archived by this manager; pass the store's full digest
+        list to also sweep orphans left by earlier runs.
+        """
+        candidates = set(self._blob_candidates if candidates is None else candidates)
+        if self.blobs is None or not candidates:
+            return {"blobs_removed": 0, "blob_bytes_freed": 0}
+        stats = self.blobs.collect(candidates, self._live_blob_refs(candidates), older_than)
+        self._blob_candidates -= candidates
+        return stats
+
+    def run(self, sweep_blobs: bool = False) -> dict:
+        """
+        Apply the policy once and return a report on reclaimed space.
+        sweep_blobs checks every stored blob instead of only those of
+        the entries archived in this run.
+        """
+        started = time.time()
+        before = self.db_size()
+        report = {"archived": 0, "segments": [], "started_at": datetime.utcnow().isoformat()}
+
+        try:
+            cutoff = self.policy.cutoff()
+            if cutoff is not None:
+                self._expire(cutoff, report)
+            if self.policy.max_size_mb is not None:
+                self._expire(None, report, size_limit=int(self.policy.max_size_mb * 1024 * 1024))
+            released_pages = self.incremental_vacuum()
+            if self.blobs is not None:
+                candidates = set(self.blobs.iter_digests()) if sweep_blobs else None
+                report.update(self.collect_blobs(candidates, older_than=started))
+        except Exception as e:
+            self.logger.error(f"Retention run failed: {e}")
+            report["error"] = str(e)
+            released_pages = 0
+
+        after = self.db_size()
+        report.update({
+            "file_bytes_before": before["file_bytes"],
+            "file_bytes_after": after["file_bytes"],
+            "live_bytes_before": before["live_bytes"],
+            "live_bytes_after": after["live_bytes"],
+            "reclaimed_bytes": before["file_bytes"] - after["file_bytes"],
+            "released_pages": released_pages
+        })
+        self.logger.info(
+            f"Archived {report['archived']} entries into {len(report['segments'])} segments, "
+            f"reclaimed {report['reclaimed_bytes']} bytes"
+        )
+        return report
+
+
+def read_archive(archive_dir: str = "archive", source: str = None, format_type: str = None,
+                 intent: str = None, since: datetime = None, until: datetime = None):
+    """Yield archived entries (as dicts) matching the given filters, oldest segment first"""
+    since_s = since.isoformat(sep=" ") if since else None
+    until_s = until.isoformat(sep=" ") if until else None
+    for path in sorted(glob.glob(os.path.join(archive_dir, ARCHIVE_PATTERN))):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if source and record["source"] != source:
+                    continue
+                if format_type and record["format"] != format_type:
+                    continue
+                if intent and record["intent"] != intent:
+                    continue
+                if since_s and record["timestamp"] < since_s:
+                    continue
+                if until_s and record["timestamp"] > until_s:
+                    continue
+                yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and compact memory_logs.db")
+    parser.add_argument("--db-url", default="sqlite:///memory_logs.db")
+    parser.add_argument("--archive-dir", default="archive")
+    parser.add_argument("--max-age-days", type=float)
+    parser.add_argument("--max-size-mb", type=float)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--blob-dir", default=os.getenv("BLOB_STORE_DIR", "blobs"),
+                        help="blob store whose unreferenced blobs are removed after archiving")
+    parser.add_argument("--sweep-blobs", action="store_true",
+                        help="check every stored blob, not just those of entries archived in this run")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="convert the database to auto_vacuum=INCREMENTAL (runs one full VACUUM)")
+    parser.add_argument("--interval", type=float,
+                        help="repeat every N seconds instead of running once")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    memory = MemoryLogger(db_url=args.db_url)
+    manager = RetentionManager(
+        memory,
+        RetentionPolicy(max_age_days=args.max_age_days, max_size_mb=args.max_size_mb),
+        archive_dir=args.archive_dir,
+        batch_size=args.batch_size,
+        blobs=BlobStore(args.blob_dir) if os.path.isdir(args.blob_dir) else None
+    )
+    if args.enable_incremental_vacuum:
+        manager.ensure_incremental_vacuum()
+
+    try:
+        while True:
+            report = manager.run(sweep_blobs=args.sweep_blobs)
+            report["segments"] = len(report["segments"])
+            print(json.dumps(report, indent=2))
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        memory.close()
+
+
+if __name__ == "__main__":
+    main()
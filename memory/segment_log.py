@@ -0,0 +1,292 @@
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import uuid
+import zlib
+from datetime import datetime
+
+from memory.backend import StorageBackend
+from memory.memory import LogEntry
+
+# Record layout: <length:uint32><crc32:uint32><json body>
+RECORD_HEADER = struct.Struct("<II")
+# Sidecar index layout: <entry id:16 bytes><record offset:uint64>
+INDEX_ENTRY = struct.Struct("<16sQ")
+
+
+class SegmentLogBackend(StorageBackend):
+    """
+    Append-only log split into fixed-size segment files.
+    Each segment has a sidecar .idx of (id, offset) pairs so point reads
+    are one dict lookup plus one slice of a memory-mapped segment.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, sync: bool = False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.sync = sync
+        self._lock = threading.RLock()
+        self._index = {}   # entry id -> (segment number, offset)
+        self._order = []   # (segment number, offset) in append order
+        self._maps = {}    # segment number -> mmap
+        self._stats = None
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            segments = self._segment_numbers()
+            for seg in segments:
+                self._load_segment(seg, is_last=(seg == segments[-1]))
+            self._open_active(segments[-1] if segments else 1)
+            self.logger.info(f"Segment log opened at {directory} with {len(self._index)} entries")
+        except Exception as e:
+            self.logger.error(f"Failed to open segment log: {e}")
+            raise
+
+    def _segment_path(self, seg: int) -> str:
+        return os.path.join(self.directory, f"segment-{seg:06d}.log")
+
+    def _index_path(self, seg: int) -> str:
+        return os.path.join(self.directory, f"segment-{seg:06d}.idx")
+
+    def _segment_numbers(self):
+        paths = glob.glob(os.path.join(self.directory, "segment-*.log"))
+        return sorted(int(os.path.basename(p)[8:14]) for p in paths)
+
+    def _load_segment(self, seg: int, is_last: bool):
+        """Load the sidecar index, then recover any records written after it"""
+        seg_path, idx_path = self._segment_path(seg), self._index_path(seg)
+        seg_size = os.path.getsize(seg_path)
+
+        entries = []
+        if os.path.exists(idx_path):
+            with open(idx_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            entries = [e for e in INDEX_ENTRY.iter_unpack(data[:usable]) if e[1] < seg_size]
+
+        # Resume scanning after the last indexed record
+        scan_from = 0
+        if entries:
+            with open(seg_path, "rb") as f:
+                f.seek(entries[-1][1])
+                length, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            scan_from = entries[-1][1] + RECORD_HEADER.size + length
+
+        recovered = []
+        with open(seg_path, "rb") as f:
+            f.seek(scan_from)
+            offset = scan_from
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc = RECORD_HEADER.unpack(header)
+                body = f.read(length)
+                if len(body) < length or zlib.crc32(body) != crc:
+                    break
+                entry_id = json.loads(body)["id"]
+                recovered.append((uuid.UUID(entry_id).bytes, offset))
+                offset += RECORD_HEADER.size + length
+
+        end = offset
+        if end < seg_size:
+            if is_last:
+                self.logger.warning(f"Truncating torn tail of {seg_path} at offset {end}")
+                with open(seg_path, "r+b") as f:
+                    f.truncate(end)
+            else:
+                self.logger.warning(f"Ignoring corrupt tail of sealed segment {seg_path}")
+
+        if recovered:
+            with open(idx_path, "ab") as f:
+                for raw_id, off in recovered:
+                    f.write(INDEX_ENTRY.pack(raw_id, off))
+            self.logger.info(f"Recovered {len(recovered)} unindexed records in {seg_path}")
+
+        for raw_id, off in entries + recovered:
+            self._index[str(uuid.UUID(bytes=raw_id))] = (seg, off)
+            self._order.append((seg, off))
+
+    def _open_active(self, seg: int):
+        self._active_seg = seg
+        self._active = open(self._segment_path(seg), "ab")
+        self._active_idx = open(self._index_path(seg), "ab")
+        self._active_size = self._active.tell()
+
+    def _roll_segment(self):
+        self._active.close()
+        self._active_idx.close()
+        self._open_active(self._active_seg + 1)
+
+    def _map(self, seg: int, needed: int):
+        """Return an mmap of seg covering at least `needed` bytes"""
+        mapped = self._maps.get(seg)
+        if mapped is not None and len(mapped) >= needed:
+            return mapped
+        with self._lock:
+            mapped = self._maps.get(seg)
+            if mapped is not None and len(mapped) >= needed:
+                return mapped
+            # The old map is left to the GC since readers may still hold slices of it
+            with open(self._segment_path(seg), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[seg] = mapped
+            return mapped
+
+    def _read(self, seg: int, offset: int) -> dict:
+        mapped = self._map(seg, offset + RECORD_HEADER.size)
+        length, crc = RECORD_HEADER.unpack_from(mapped, offset)
+        start = offset + RECORD_HEADER.size
+        if len(mapped) < start + length:
+            mapped = self._map(seg, start + length)
+        body = mapped[start:start + length]
+        if zlib.crc32(body) != crc:
+            raise ValueError(f"Checksum mismatch in segment {seg} at offset {offset}")
+        return json.loads(body)
+
+    @staticmethod
+    def _to_entry(record: dict) -> LogEntry:
+        return LogEntry(
+            id=record["id"],
+            source=record["source"],
+            format=record["format"],
+            intent=record["intent"],
+            payload=record["payload"],
+            timestamp=datetime.fromisoformat(record["timestamp"]),
+            minhash=bytes.fromhex(record["minhash"]) if record.get("minhash") else None
+        )
+
+    def _iter_newest(self):
+        # _order only grows, so walking it by index needs no copy and ignores later appends
+        for i in range(len(self._order) - 1, -1, -1):
+            yield self._read(*self._order[i])
+
+    def log_entry(self, source: str, format_type: str, intent: str, payload: dict, minhash: bytes = None,
+                  search_text: str = None, entry_id: str = None):
+        entry_id = uuid.UUID(entry_id) if entry_id else uuid.uuid4()
+        body = json.dumps({
+            "id": str(entry_id),
+            "source": source,
+            "format": format_type,
+            "intent": intent,
+            "payload": json.dumps(payload, default=str),
+            "timestamp": datetime.utcnow().isoformat(),
+            "minhash": minhash.hex() if minhash else None
+        }).encode("utf-8")
+
+        with self._lock:
+            try:
+                if self._active_size >= self.segment_bytes:
+                    self._roll_segment()
+                offset = self._active_size
+                self._active.write(RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body)
+                self._active.flush()
+                # Index after the record so a crash never leaves an index entry without data
+                self._active_idx.write(INDEX_ENTRY.pack(entry_id.bytes, offset))
+                self._active_idx.flush()
+                if self.sync:
+                    os.fsync(self._active.fileno())
+                    os.fsync(self._active_idx.fileno())
+                self._active_size = offset + RECORD_HEADER.size + len(body)
+                self._index[str(entry_id)] = (self._active_seg, offset)
+                self._order.append((self._active_seg, offset))
+                if self._stats is not None:
+                    self._count(self._stats, format_type, intent)
+            except Exception as e:
+                self.logger.error(f"Failed to log entry: {e}")
+                raise
+
+        self.logger.debug(f"Logged entry for source: {source}")
+        return str(entry_id)
+
+    def fetch_all(self, limit=10):
+        try:
+            return [self._to_entry(r) for r, _ in zip(self._iter_newest(), range(limit))]
+        except Exception as e:
+            self.logger.error(f"Failed to fetch entries: {e}")
+            return []
+
+    def fetch_by_id(self, entry_id: str):
+        location = self._index.get(entry_id)
+        if location is None:
+            return None
+        try:
+            return self._to_entry(self._read(*location))
+        except Exception as e:
+            self.logger.error(f"Failed to fetch entry {entry_id}: {e}")
+            return None
+
+    def _fetch_where(self, field: str, value: str, limit):
+        entries = []
+        for record in self._iter_newest():
+            if record[field] == value:
+                entries.append(self._to_entry(record))
+                if len(entries) >= limit:
+                    break
+        return entries
+
+    def fetch_by_source(self, source: str, limit=10):
+        """Fetch entries by source name"""
+        try:
+            return self._fetch_where("source", source, limit)
+        except Exception as e:
+            self.logger.error(f"Failed to fetch entries by source: {e}")
+            return []
+
+    def fetch_by_intent(self, intent: str, limit=10):
+        """Fetch entries by intent"""
+        try:
+            return self._fetch_where("intent", intent, limit)
+        except Exception as e:
+            self.logger.error(f"Failed to fetch entries by intent: {e}")
+            return []
+
+    def iter_signatures(self, batch_size: int = 10000):
+        """Yield (id, minhash) for every entry that has a signature"""
+        for seg, offset in self._order[:]:
+            record = self._read(seg, offset)
+            if record.get("minhash"):
+                yield record["id"], bytes.fromhex(record["minhash"])
+
+    @staticmethod
+    def _count(stats: dict, format_type: str, intent: str):
+        stats["total_entries"] += 1
+        if format_type:
+            stats["format_counts"][format_type] = stats["format_counts"].get(format_type, 0) + 1
+        if intent:
+            stats["intent_counts"][intent] = stats["intent_counts"].get(intent, 0) + 1
+
+    def get_stats(self):
+        """Get statistics about logged entries"""
+        try:
+            with self._lock:
+                if self._stats is None:
+                    # One full scan, then kept current by log_entry
+                    stats = {"total_entries": 0, "format_counts": {}, "intent_counts": {}}
+                    for seg, offset in self._order:
+                        record = self._read(seg, offset)
+                        self._count(stats, record["format"], record["intent"])
+                    self._stats = stats
+                return {
+                    "total_entries": self._stats["total_entries"],
+                    "format_counts": dict(self._stats["format_counts"]),
+                    "intent_counts": dict(self._stats["intent_counts"])
+                }
+        except Exception as e:
+            self.logger.error(f"Failed to get stats: {e}")
+            return {"error": str(e)}
+
+    def close(self):
+        """Flush and close segment files"""
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps = {}
+            if not self._active.closed:
+                self._active.close()
+                self._active_idx.close()
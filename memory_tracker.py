@@ -0,0 +1,51 @@
+import os
+import resource
+import threading
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (falls back to the lifetime peak off Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakMemoryTracker:
+    """
+    Samples process RSS on a background thread while a block runs and
+    reports the peak growth over the starting RSS. Documents routed
+    concurrently share one process, so their figures overlap.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return False
+
+    def report(self) -> dict:
+        return {
+            "rss_baseline_mb": round(self.baseline / 1048576, 2),
+            "rss_peak_mb": round(self.peak / 1048576, 2),
+            "rss_peak_delta_mb": round((self.peak - self.baseline) / 1048576, 2)
+        }
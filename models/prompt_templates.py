@@ -48,4 +48,27 @@ You are an Email Parsing assistant. Given the email body below extract:
  Email:
  {email_content}
 
-""" 
\ No newline at end of file
+""" 
+
+PDF_CHUNK_PROMPT="""
+You are a PDF section analyst. The text below is pages {page_start}-{page_end}
+of a longer document whose intent is {intent}. Extract only what appears in this text:
+ - Summary of this section in 1-2 sentences
+ - Key points (facts, requests, obligations)
+ - Parties (people, companies, email addresses)
+ - Dates
+ - Monetary amounts, with currency
+
+ Respond in JSON:
+ {{
+ "summary":"...",
+ "key_points":["..."],
+ "parties":["..."],
+ "dates":["..."],
+ "amounts":["..."]
+ }}
+
+ Section:
+ {section_content}
+
+"""
@@ -0,0 +1,369 @@
+"""
+Multi-process ingestion: N worker processes each run their own
+AgentRouter, and a single writer process owns the memory store.
+Workers send log records over a queue so only one process ever writes
+to memory_logs.db.
+
+    python -m worker_pool --workers 4 path/to/files/*
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from memory.backend import StorageBackend, create_memory
+from memory.memory import LogEntry
+
+_STOP = None
+
+
+class QueueMemory(StorageBackend):
+    """
+    StorageBackend used inside workers: log_entry ships the record to
+    the writer process. Recently logged entries are remembered so the
+    worker's near-duplicate index can still resolve its own matches.
+    """
+
+    def __init__(self, log_queue, recent: int = 10000):
+        self.log_queue = log_queue
+        self.recent = recent
+        self._recent = OrderedDict()
+        self._next_entry_id = None
+
+    def assign_entry_id(self, entry_id: str):
+        """Log the next entry under entry_id, so a retried task reuses its id"""
+        self._next_entry_id = entry_id
+
+    def log_entry(self, source: str, format_type: str, intent: str, payload: dict, minhash: bytes = None,
+                  search_text: str = None, entry_id: str = None):
+        entry_id = entry_id or self._next_entry_id or str(uuid.uuid4())
+        self._next_entry_id = None
+        self.log_queue.put({
+            "entry_id": entry_id,
+            "source": source,
+            "format_type": format_type,
+            "intent": intent,
+            # Serialize here so the writer never has to unpickle arbitrary agent output
+            "payload": json.loads(json.dumps(payload, default=str)),
+            "minhash": minhash,
+            "search_text": search_text
+        })
+        self._recent[entry_id] = LogEntry(id=entry_id, source=source, format=format_type, intent=intent)
+        if len(self._recent) > self.recent:
+            self._recent.popitem(last=False)
+        return entry_id
+
+    def fetch_by_id(self, entry_id: str):
+        return self._recent.get(entry_id)
+
+    def fetch_all(self, limit=10):
+        return list(reversed(self._recent.values()))[:limit]
+
+    def fetch_by_source(self, source: str, limit=10):
+        return [e for e in self.fetch_all(len(self._recent)) if e.source == source][:limit]
+
+    def fetch_by_intent(self, intent: str, limit=10):
+        return [e for e in self.fetch_all(len(self._recent)) if e.intent == intent][:limit]
+
+    def iter_signatures(self, batch_size: int = 10000):
+        return iter(())
+
+    def get_stats(self):
+        return {"error": "Stats are only available from the writer process"}
+
+
+def _writer_main(log_queue, result_queue, db_url: str, batch_size: int):
+    """
+    Single owner of the memory store; drains the log queue in batches.
+    A record whose entry_id was already written (a task retried after
+    its worker died between logging and reporting back) is skipped
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger("LogWriter")
+    memory = create_memory(db_url)
+    written, failed, duplicates = 0, 0, 0
+    seen = set()
+    try:
+        stopping = False
+        while not stopping:
+            batch = [log_queue.get()]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [r for r in batch if r is not _STOP]
+            unique = []
+            for record in batch:
+                if record["entry_id"] in seen:
+                    duplicates += 1
+                else:
+                    seen.add(record["entry_id"])
+                    unique.append(record)
+            batch = unique
+            if not batch:
+                continue
+            try:
+                memory.log_entries(batch)
+                written += len(batch)
+            except Exception as e:
+                logger.error(f"Batch write failed, retrying entries one by one: {e}")
+                for record in batch:
+                    try:
+                        memory.log_entry(**record)
+                        written += 1
+                    except Exception as e:
+                        logger.error(f"Dropping log record for {record.get('source')}: {e}")
+                        failed += 1
+    finally:
+        memory.close()
+        result_queue.put(("writer_done", {"written": written, "failed": failed, "duplicates": duplicates}))
+
+
+def _worker_main(worker_id: int, task_queue, result_queue, log_queue, router_kwargs: dict,
+                 stub_llm_latency):
+    """Route tasks from this worker's queue with a private AgentRouter until the stop sentinel"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.WARNING)
+    from agent_router import AgentRouter
+
+    memory = QueueMemory(log_queue)
+    router = AgentRouter(memory=memory, **router_kwargs)
+    if stub_llm_latency is not None:
+        from benchmarks.stub_llm import install_stub
+        install_stub(router, latency=stub_llm_latency)
+    result_queue.put(("ready", worker_id))
+
+    while True:
+        task = task_queue.get()
+        if task is _STOP:
+            break
+        task_id, path, source_name, entry_id = task
+        start = time.perf_counter()
+        memory.assign_entry_id(entry_id)
+        try:
+            out = router.route_file(path, source_name=source_name)
+            summary = {
+                "source": out["source"],
+                "format": out["format"],
+                "intent": out["intent"],
+                "error": out.get("result", {}).get("error")
+            }
+        except Exception as e:
+            summary = {"source": source_name, "format": "Unknown", "intent": "Unknown", "error": str(e)}
+        summary["seconds"] = round(time.perf_counter() - start, 4)
+        summary["worker"] = worker_id
+        result_queue.put(("done", (task_id, summary)))
+
+
+class WorkerPool:
+    """
+    Runs documents through num_workers AgentRouter processes with one
+    log writer process. The pool hands each worker one document at a
+    time on the worker's own queue, so it always knows what a worker
+    holds. Dead workers are detected and replaced, and their in-flight
+    document is retried once under the same entry id, so it is never
+    logged twice. A dead writer fails the run.
+    """
+
+    def __init__(self, num_workers: int = None, db_url: str = "sqlite:///memory_logs.db",
+                 router_kwargs: dict = None, stub_llm_latency: float = None,
+                 write_batch_size: int = 200, max_retries: int = 1):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.db_url = db_url
+        self.router_kwargs = dict(router_kwargs or {})
+        self.router_kwargs.setdefault("groq_api_key", os.getenv("GROQ_API_KEY"))
+        self.stub_llm_latency = stub_llm_latency
+        self.write_batch_size = write_batch_size
+        self.max_retries = max_retries
+
+        self._ctx = mp.get_context("spawn")
+        self.task_queues = {}  # worker id -> that worker's task queue
+        self.result_queue = self._ctx.Queue()
+        self.log_queue = self._ctx.Queue(maxsize=10000)
+        self.workers = {}
+        self.writer = None
+        self._in_flight = {}  # worker id -> task id
+        self._ready = set()
+        self._idle = set()
+        self._next_worker_id = 0
+        self.writer_stats = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
+
+    def _spawn_worker(self):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        self.task_queues[worker_id] = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.task_queues[worker_id], self.result_queue, self.log_queue,
+                  self.router_kwargs, self.stub_llm_latency),
+            name=f"ingest-worker-{worker_id}",
+            daemon=True
+        )
+        proc.start()
+        self.workers[worker_id] = proc
+
+    def start(self):
+        self.writer = self._ctx.Process(
+            target=_writer_main,
+            args=(self.log_queue, self.result_queue, self.db_url, self.write_batch_size),
+            name="log-writer"
+        )
+        self.writer.start()
+        for _ in range(self.num_workers):
+            self._spawn_worker()
+        self.logger.info(f"Started {self.num_workers} workers and a log writer")
+
+    def _check_workers(self, pending: deque, attempts: dict, results: dict, tasks: dict):
+        """Replace dead workers and requeue (or fail) whatever they were processing"""
+        for worker_id, proc in list(self.workers.items()):
+            if proc.is_alive():
+                continue
+            del self.workers[worker_id]
+            self._idle.discard(worker_id)
+            # Anything still buffered for the dead worker is covered by _in_flight
+            self.task_queues.pop(worker_id).cancel_join_thread()
+            task_id = self._in_flight.pop(worker_id, None)
+            self.logger.error(f"Worker {worker_id} exited with code {proc.exitcode}")
+            if worker_id not in self._ready:
+                # Died during startup (bad config, missing API key): respawning would loop forever
+                raise RuntimeError(f"Worker {worker_id} failed to start (exit code {proc.exitcode})")
+            if task_id is not None and task_id not in results:
+                if attempts[task_id] <= self.max_retries:
+                    attempts[task_id] += 1
+                    pending.appendleft(task_id)
+                else:
+                    results[task_id] = {
+                        "source": tasks[task_id][1], "format": "Unknown", "intent": "Unknown",
+                        "error": f"Worker crashed (exit code {proc.exitcode})", "worker": worker_id
+                    }
+            self._spawn_worker()
+
+    def _assign(self, pending: deque, tasks: dict):
+        """Give each idle worker its next document"""
+        while pending and self._idle:
+            worker_id = self._idle.pop()
+            task_id = pending.popleft()
+            self._in_flight[worker_id] = task_id
+            self.task_queues[worker_id].put((task_id, *tasks[task_id]))
+
+    def _check_writer(self):
+        """Nothing routed without the writer would be stored, so its death ends the run"""
+        if self.writer is not None and not self.writer.is_alive():
+            raise RuntimeError(f"Log writer exited with code {self.writer.exitcode}")
+
+    def process_files(self, paths, timeout: float = None) -> list:
+        """Route every path and return per-document summaries in input order"""
+        tasks = {i: (path, os.path.basename(path), str(uuid.uuid4())) for i, path in enumerate(paths)}
+        attempts = {i: 1 for i in tasks}
+        results = {}
+        pending = deque(tasks)
+
+        deadline = time.monotonic() + timeout if timeout else None
+        while len(results) < len(tasks):
+            self._check_writer()
+            self._check_workers(pending, attempts, results, tasks)
+            self._assign(pending, tasks)
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError(f"{len(tasks) - len(results)} documents still pending")
+            try:
+                kind, body = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if kind == "ready":
+                self._ready.add(body)
+                self._idle.add(body)
+            elif kind == "done":
+                task_id, summary = body
+                results[task_id] = summary
+                worker_id = summary["worker"]
+                if self._in_flight.get(worker_id) == task_id:
+                    del self._in_flight[worker_id]
+                    if worker_id in self.workers:
+                        self._idle.add(worker_id)
+            elif kind == "writer_done":
+                self.writer_stats = body
+        return [results[i] for i in sorted(results)]
+
+    def shutdown(self, timeout: float = 30):
+        """Stop workers after their current document, then flush and stop the writer"""
+        for worker_id in self.workers:
+            self.task_queues[worker_id].put(_STOP)
+        for proc in self.workers.values():
+            proc.join(timeout)
+            if proc.is_alive():
+                self.logger.warning(f"Terminating unresponsive worker {proc.name}")
+                proc.terminate()
+        self.workers = {}
+        self.task_queues = {}
+        self._idle.clear()
+
+        if self.writer is not None:
+            self.log_queue.put(_STOP)
+            deadline = time.monotonic() + timeout
+            while self.writer_stats is None and time.monotonic() < deadline:
+                try:
+                    kind, body = self.result_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if not self.writer.is_alive():
+                        break
+                    continue
+                if kind == "writer_done":
+                    self.writer_stats = body
+            self.writer.join(timeout)
+            if self.writer.is_alive():
+                self.logger.error("Log writer did not finish in time, terminating")
+                self.writer.terminate()
+            self.writer = None
+        self.logger.info(f"Worker pool stopped, writer stats: {self.writer_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route files with multiple worker processes")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--db-url", default=os.getenv("MEMORY_DB_URL", "sqlite:///memory_logs.db"))
+    parser.add_argument("--stub-llm-latency", type=float,
+                        help="use the offline stub LLM with this latency instead of Groq")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key and args.stub_llm_latency is None:
+        parser.error("GROQ_API_KEY is not set (use --stub-llm-latency for an offline run)")
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    with WorkerPool(args.workers, db_url=args.db_url, stub_llm_latency=args.stub_llm_latency,
+                    router_kwargs={"groq_api_key": api_key or "stub"}) as pool:
+        results = pool.process_files(args.paths)
+    elapsed = time.perf_counter() - start
+    for summary in results:
+        print(json.dumps(summary))
+    print(json.dumps({
+        "documents": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "docs_per_sec": round(len(results) / elapsed, 2),
+        "writer": pool.writer_stats
+    }))
+
+
+if __name__ == "__main__":
+    main()